@@ -0,0 +1,110 @@
+"""
+Benchmark: cancelling a user's warming sequence with 100k messages scheduled.
+
+Compares the old approach (scan every job in the JobQueue and prefix-match
+its name) with the indexed (telegram_id, sequence) lookup on the
+scheduled_messages table.
+
+Run from the repo root:
+    python benchmarks/bench_cancel_jobs.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db, get_session, close_db, ScheduledMessage  # noqa: E402
+from handlers.sequences import SEQUENCE_A, cancel_jobs, schedule_sequence_a  # noqa: E402
+
+TOTAL_JOBS = 100_000
+USERS = TOTAL_JOBS // len(SEQUENCE_A)
+SAMPLES = 200
+
+
+class _FakeJob:
+    __slots__ = ("name", "removed")
+
+    def __init__(self, name):
+        self.name = name
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+def _legacy_cancel(jobs, user_id, prefix):
+    """The pre-index cancel_jobs: O(all scheduled jobs) per call"""
+    cancelled = 0
+    for job in jobs:
+        if job.name and job.name.startswith(f"{prefix}_{user_id}"):
+            job.schedule_removal()
+            cancelled += 1
+    return cancelled
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    print(f"{label:<28} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+
+
+async def main():
+    users = random.sample(range(1, USERS + 1), SAMPLES)
+
+    # Legacy: list of 100k named jobs, linear scan
+    jobs = [_FakeJob(f"seq_a_{uid}_{day}") for uid in range(1, USERS + 1) for day in SEQUENCE_A]
+    legacy = []
+    for uid in users:
+        start = time.perf_counter()
+        _legacy_cancel(jobs, uid, "seq_a")
+        legacy.append(time.perf_counter() - start)
+
+    # Indexed: 100k rows in scheduled_messages
+    with tempfile.TemporaryDirectory() as tmp:
+        init_db(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db = get_session()
+        now = datetime.utcnow()
+        db.bulk_insert_mappings(ScheduledMessage, [
+            {"telegram_id": uid, "sequence": "seq_a", "day": day, "due_at": now}
+            for uid in range(1, USERS + 1) for day in SEQUENCE_A
+        ])
+        db.commit()
+        print(f"scheduled rows: {db.query(ScheduledMessage).count():,}")
+        db.close()
+
+        indexed = []
+        for uid in users:
+            start = time.perf_counter()
+            await cancel_jobs(None, uid, "seq_a")
+            indexed.append(time.perf_counter() - start)
+
+        rescheduled = []
+        for uid in users[:50]:
+            start = time.perf_counter()
+            await schedule_sequence_a(None, uid)
+            await schedule_sequence_a(None, uid)  # repeated /start: must stay a no-op
+            rescheduled.append(time.perf_counter() - start)
+
+        db = get_session()
+        duplicates = db.query(ScheduledMessage).filter(
+            ScheduledMessage.telegram_id == users[0]
+        ).count()
+        db.close()
+        await close_db()
+
+    _report("legacy scan cancel", legacy)
+    _report("indexed cancel", indexed)
+    _report("idempotent schedule x2", rescheduled)
+    print(f"rows for a user after two /start: {duplicates} (expected {len(SEQUENCE_A)})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Benchmark: streaming a filtered slice of 1M users.
+
+Compares keyset pagination (database.iter_user_pages) with OFFSET paging
+over the same filter, and the selective filter with and without the
+composite indexes on users. Reports per-page latency at the start and
+the end of the stream and peak Python memory.
+
+Run from the repo root (BENCH_USERS overrides the row count):
+    python benchmarks/bench_iter_users.py
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from database import init_db, get_session, close_db, iter_user_pages, User  # noqa: E402
+
+ROWS = int(os.getenv("BENCH_USERS", "1000000"))
+PAGE_SIZE = 1000
+
+
+def _populate():
+    random.seed(1)
+    start = datetime(2025, 1, 1)
+    db = get_session()
+    for chunk in range(0, ROWS, 50_000):
+        rows = []
+        for i in range(chunk, min(chunk + 50_000, ROWS)):
+            quiz = random.random() < 0.3
+            rows.append({
+                "telegram_id": 10_000_000 + i,
+                "first_name": f"user{i}",
+                "quiz_completed": quiz,
+                "vision_started": quiz and random.random() < 0.07,  # ~2% of all users
+                "sequence_a_day": random.randint(0, 4),
+                "sequence_b_day": random.randint(0, 7) if quiz else 0,
+                "created_at": start + timedelta(seconds=i * 30),
+                "last_active": start + timedelta(seconds=i * 30),
+            })
+        db.execute(insert(User), rows)
+        db.commit()
+    db.close()
+
+
+def _ms(seconds):
+    return seconds * 1000
+
+
+async def _stream(where):
+    """Stream everything via iter_user_pages, timing each page"""
+    timings = []
+    count = 0
+    started = time.perf_counter()
+    pages = iter_user_pages(where, page_size=PAGE_SIZE)
+    while True:
+        t = time.perf_counter()
+        try:
+            page = await pages.__anext__()
+        except StopAsyncIteration:
+            break
+        timings.append(time.perf_counter() - t)
+        count += len(page)
+    return count, time.perf_counter() - started, timings
+
+
+async def _peak_memory(where):
+    tracemalloc.start()
+    async for _ in iter_user_pages(where, page_size=PAGE_SIZE):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _query_ms(query, repeat=20):
+    """Median time of the SQL alone (ids only, no ORM objects)"""
+    db = get_session()
+    timings = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        db.execute(query).all()
+        timings.append(time.perf_counter() - t)
+    db.close()
+    return _ms(statistics.median(timings))
+
+
+def _nth_id(where, n):
+    db = get_session()
+    value = db.scalar(select(User.id).where(where).order_by(User.id).offset(n).limit(1))
+    db.close()
+    return value
+
+
+def _page_queries(where, count):
+    """(keyset, offset) id-page queries at the start and near the end of the slice"""
+    deep = max(0, count - PAGE_SIZE)
+    deep_id = _nth_id(where, deep - 1) if deep else 0
+    base = select(User.id).where(where).order_by(User.id).limit(PAGE_SIZE)
+    return {
+        "keyset start": base.where(User.id > 0),
+        f"keyset at row {deep:,}": base.where(User.id > deep_id),
+        "offset start": base.offset(0),
+        f"offset at row {deep:,}": base.offset(deep),
+    }
+
+
+def _report_stream(label, count, total, timings):
+    tenth = max(1, len(timings) // 10)
+    print(
+        f"{label:<34} {count:>8,} rows in {len(timings):>4} pages  total {total:6.2f} s  "
+        f"page p50 first 10% {_ms(statistics.median(timings[:tenth])):6.2f} ms  "
+        f"last 10% {_ms(statistics.median(timings[-tenth:])):6.2f} ms"
+    )
+
+
+def _report_queries(label, queries):
+    print(f"{label}: " + "  ".join(f"{name} {_query_ms(q):7.2f} ms" for name, q in queries.items()))
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        init_db(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        t = time.perf_counter()
+        _populate()
+        db = get_session()
+        db.execute(text("ANALYZE"))
+        db.close()
+        print(f"populated {ROWS:,} users in {time.perf_counter() - t:.1f} s\n")
+
+        quiz = User.quiz_completed.is_(True)
+        vision = User.vision_started.is_(True)
+
+        print("iter_user_pages (ORM pages of 1000)")
+        quiz_count, *rest = await _stream(quiz)
+        _report_stream("  quiz_completed", quiz_count, *rest)
+        vision_count, *rest = await _stream(vision)
+        _report_stream("  vision_started", vision_count, *rest)
+        print(f"  peak Python memory streaming quiz_completed: {await _peak_memory(quiz) / 2**20:.1f} MiB\n")
+
+        print("SQL per page (ids only)")
+        _report_queries("  quiz_completed, indexed", _page_queries(quiz, quiz_count))
+        _report_queries("  vision_started, indexed", _page_queries(vision, vision_count))
+
+        db = get_session()
+        for index in User.__table__.indexes:
+            db.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        db.commit()
+        db.close()
+        _report_queries("  vision_started, no index", _page_queries(vision, vision_count))
+
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
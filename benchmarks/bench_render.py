@@ -0,0 +1,95 @@
+"""
+Benchmark: per-send CPU for building message text and keyboards.
+
+Compares what the handlers used to do on every send (build a fresh
+keyboard, str.format the template) with the render cache in
+content/render.py (shared keyboards, pre-parsed templates, pre-rendered
+parameter-free texts).
+
+Run from the repo root:
+    python benchmarks/bench_render.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import (  # noqa: E402
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+    WebAppInfo,
+)
+
+from config import CALCULATOR_URL, MYCELIUM_APP_URL  # noqa: E402
+from content.messages import SEQ_A_DAY2, SEQ_B_DAY7, RESULT_WITH_BLOCKER  # noqa: E402
+from content.render import render, LAUNCHPAD_KEYBOARD, VISION_PHASE_KEYBOARD, DESKTOP_KEYBOARD  # noqa: E402
+
+NUMBER = 50_000
+
+
+def legacy_seq_a():
+    text = SEQ_A_DAY2
+    keyboard = ReplyKeyboardMarkup([[
+        KeyboardButton(
+            "🚀 Пройти Idea Launchpad",
+            web_app=WebAppInfo(url=CALCULATOR_URL)
+        )
+    ]], resize_keyboard=True)
+    return text, keyboard
+
+
+def cached_seq_a():
+    return render(SEQ_A_DAY2), LAUNCHPAD_KEYBOARD
+
+
+def legacy_seq_b():
+    text = SEQ_B_DAY7
+    if "{score}" in text:
+        text = text.format(score=73)
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("✨ Начать Vision Phase", url=MYCELIUM_APP_URL)
+    ]])
+    return text, keyboard
+
+
+def cached_seq_b():
+    return render(SEQ_B_DAY7, score=73), VISION_PHASE_KEYBOARD
+
+
+def legacy_quiz_result():
+    text = RESULT_WITH_BLOCKER.format(name="Маша", score=62, blocker="Паралич анализа", char_name="Zen")
+    keyboard = InlineKeyboardMarkup([[
+        InlineKeyboardButton("🖥 Открыть на десктопе", url=MYCELIUM_APP_URL)
+    ]])
+    return text, keyboard
+
+
+def cached_quiz_result():
+    text = render(RESULT_WITH_BLOCKER, name="Маша", score=62, blocker="Паралич анализа", char_name="Zen")
+    return text, DESKTOP_KEYBOARD
+
+
+def _per_call_us(fn):
+    return min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main():
+    cases = [
+        ("sequence A (static text)", legacy_seq_a, cached_seq_a),
+        ("sequence B ({score})", legacy_seq_b, cached_seq_b),
+        ("quiz result (4 slots)", legacy_quiz_result, cached_quiz_result),
+    ]
+    for label, legacy, cached in cases:
+        assert legacy()[0] == cached()[0]
+        assert legacy()[1] == cached()[1]
+        before = _per_call_us(legacy)
+        after = _per_call_us(cached)
+        print(f"{label:<28} before {before:7.2f} us   after {after:7.2f} us   x{before / after:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
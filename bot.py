@@ -1,15 +1,35 @@
+import asyncio
 import logging
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 
-from config import BOT_TOKEN, DATABASE_URL
-from database import init_db
+from config import (
+    BOT_TOKEN,
+    DATABASE_URL,
+    UPDATE_CONCURRENCY,
+    SEQUENCE_POLL_SECONDS,
+    NUDGE_SWEEP_HOURS,
+    VIDEO_REFRESH_HOURS,
+    WEBHOOK_URL,
+    WEBHOOK_SECRET,
+    RUN_JOBS,
+    METRICS_HOST,
+    METRICS_PORT,
+)
+from content.videos import video_registry, refresh_videos
+from database import init_db, close_db
+from database.supabase_client import get_supabase_client
+from services.metrics import InstrumentedRequest, instrument_handlers, start_metrics_server
+from services.outbound import OutboundRateLimiter
+from services.webhook import run_webhook
 from handlers import (
     start_handler,
     quiz_result_handler,
     video_handler,
     download_all_handler,
-    status_handler
+    status_handler,
+    process_due_sequences,
+    nudge_sweep
 )
 
 # Configure logging
@@ -20,12 +40,35 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def on_startup(app: Application):
+    """Open shared connections before the bot starts handling updates"""
+    supabase = get_supabase_client()
+    if supabase.is_enabled:
+        await supabase.start()
+
+    app.bot_data["metrics_server"] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    # Stale video file_ids go to the negative cache before the first send
+    await video_registry.validate(app.bot)
+
+
+async def on_shutdown(app: Application):
+    """Release shared resources when the bot stops"""
+    metrics_server = app.bot_data.get("metrics_server")
+    if metrics_server:
+        await metrics_server.cleanup()
+    await get_supabase_client().close()
+    await close_db()
+
+
 def main():
     """Start the bot"""
     # Validate config
     if not BOT_TOKEN:
         logger.error("BOT_TOKEN not found in environment variables!")
         raise ValueError("BOT_TOKEN is required. Set it in .env file.")
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        raise ValueError("WEBHOOK_SECRET is required when WEBHOOK_URL is set.")
 
     # Initialize database
     logger.info("Initializing database...")
@@ -33,7 +76,17 @@ def main():
 
     # Create application
     logger.info("Creating bot application...")
-    app = Application.builder().token(BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .request(InstrumentedRequest())
+        .rate_limiter(OutboundRateLimiter())
+        # Handlers await the DB / bridge: let slow ones overlap instead of queueing every update
+        .concurrent_updates(UPDATE_CONCURRENCY)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Add handlers
     app.add_handler(CommandHandler("start", start_handler))
@@ -44,10 +97,43 @@ def main():
         quiz_result_handler
     ))
     app.add_handler(MessageHandler(filters.VIDEO, video_handler))
+    instrument_handlers(app)
+
+    if RUN_JOBS:
+        # Warming sequences: one poller sends every due message from the DB queue
+        app.job_queue.run_repeating(
+            process_due_sequences,
+            interval=SEQUENCE_POLL_SECONDS,
+            first=10,
+            name="sequence_poller"
+        )
+
+        # Nudges: sweep the quiz graduates who are due (last_nudged_at in the DB),
+        # a bridge call per page of users; restarts don't reset anyone's schedule
+        app.job_queue.run_repeating(
+            nudge_sweep,
+            interval=NUDGE_SWEEP_HOURS * 3600,
+            first=60,
+            name="nudge_sweep"
+        )
+    else:
+        logger.info("RUN_JOBS=0: sequence poller and nudge sweep run on another replica")
+
+    # Re-check video file_ids in the background
+    app.job_queue.run_repeating(
+        refresh_videos,
+        interval=VIDEO_REFRESH_HOURS * 3600,
+        first=VIDEO_REFRESH_HOURS * 3600,
+        name="video_refresh"
+    )
 
-    # Start polling
-    logger.info("Bot starting... Press Ctrl+C to stop.")
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    if WEBHOOK_URL:
+        logger.info("Bot starting in webhook mode... Press Ctrl+C to stop.")
+        asyncio.run(run_webhook(app))
+    else:
+        # Start polling
+        logger.info("Bot starting... Press Ctrl+C to stop.")
+        app.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == "__main__":
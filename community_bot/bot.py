@@ -17,10 +17,15 @@ from config import (
     COMMUNITY_CHAT_ID,
     RESPONSE_PROBABILITY,
     TRIGGER_KEYWORDS,
-    BOT_NAME
+    BOT_NAME,
+    METRICS_HOST,
+    METRICS_PORT
 )
 from gemini_client import get_gemini_client
 from daily_card import get_card_generator
+from metrics import InstrumentedRequest, instrument_handlers, start_metrics_server
+from outbound import OutboundRateLimiter, PRIORITY_BROADCAST
+from triggers import TriggerMatcher
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +34,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Names the bot answers to and keywords that raise the response chance, compiled once
+TRIGGERS = TriggerMatcher(name=["toxic", "токсик", "токсика", "токсику"], keyword=TRIGGER_KEYWORDS)
+
 # Timezone for Spain
 TIMEZONE = "Europe/Madrid"
 
@@ -249,16 +257,12 @@ async def handle_new_member_intro(update: Update, context: ContextTypes.DEFAULT_
         await message.reply_text("хм, интересно. расскажи подробнее — что конкретно строишь или хочешь построить?")
 
 
-def should_respond(message_text: str, is_reply_to_bot: bool, is_mention: bool) -> bool:
+def should_respond(has_trigger: bool, is_reply_to_bot: bool, is_mention: bool) -> bool:
     """Determine if bot should respond to this message"""
     # Always respond to direct replies and mentions
     if is_reply_to_bot or is_mention:
         return True
 
-    # Check for trigger keywords
-    text_lower = message_text.lower()
-    has_trigger = any(keyword in text_lower for keyword in TRIGGER_KEYWORDS)
-
     if has_trigger:
         # Higher probability for trigger keywords
         return random.random() < 0.7
@@ -283,7 +287,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Message from {user.first_name} in chat {chat_id}: {message.text[:100]}")
 
     # Skip bot's own messages (but allow channel forwards)
-    if user.is_bot and user.id == (await context.bot.get_me()).id:
+    if user.is_bot and user.id == context.bot.id:
         logger.info("Skipping own bot message")
         return
 
@@ -303,13 +307,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message.reply_to_message.from_user.id == context.bot.id
     )
 
-    # Check if bot is mentioned by @username
-    bot_username = (await context.bot.get_me()).username
+    # Check if bot is mentioned by @username (cached by Application.initialize)
+    bot_username = context.bot.username
     is_mention = f"@{bot_username}" in message.text if bot_username else False
 
-    # Check if bot is called by name (toxic, токсик)
-    text_lower = message.text.lower()
-    is_called_by_name = any(name in text_lower for name in ["toxic", "токсик", "токсика", "токсику"])
+    # Check if bot is called by name (toxic, токсик) or by a trigger keyword
+    triggers = TRIGGERS.match(message.text)
+    is_called_by_name = "name" in triggers
 
     # Always respond to new member intros
     if is_new_member_intro and is_reply_to_bot:
@@ -317,7 +321,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Decide if we should respond
-    if not should_respond(message.text, is_reply_to_bot, is_mention or is_called_by_name):
+    if not should_respond("keyword" in triggers, is_reply_to_bot, is_mention or is_called_by_name):
         return
 
     logger.info(f"Responding to message from {user.first_name}: {message.text[:50]}...")
@@ -352,7 +356,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = message.from_user
 
     # Skip bot's own messages
-    if user.is_bot and user.id == (await context.bot.get_me()).id:
+    if user.is_bot and user.id == context.bot.id:
         return
 
     # Check if bot should respond to this photo
@@ -363,11 +367,10 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message.reply_to_message.from_user.id == context.bot.id
     )
 
-    bot_username = (await context.bot.get_me()).username
+    bot_username = context.bot.username
     is_mention = f"@{bot_username}" in caption if bot_username else False
 
-    text_lower = caption.lower()
-    is_called_by_name = any(name in text_lower for name in ["toxic", "токсик", "токсика", "токсику"])
+    is_called_by_name = "name" in TRIGGERS.match(caption)
 
     # Only respond to photos if explicitly mentioned or replied to
     if not (is_reply_to_bot or is_mention or is_called_by_name):
@@ -493,12 +496,13 @@ async def daily_card_job(context: ContextTypes.DEFAULT_TYPE):
                 await context.bot.send_photo(
                     chat_id=COMMUNITY_CHAT_ID,
                     photo=io.BytesIO(image_bytes),
-                    caption="🎴 карточка дня от токсика"
+                    caption="🎴 карточка дня от токсика",
+                    rate_limit_args=PRIORITY_BROADCAST
                 )
                 # Then send full text
-                await context.bot.send_message(chat_id=COMMUNITY_CHAT_ID, text=caption)
+                await context.bot.send_message(chat_id=COMMUNITY_CHAT_ID, text=caption, rate_limit_args=PRIORITY_BROADCAST)
             else:
-                await context.bot.send_message(chat_id=COMMUNITY_CHAT_ID, text=caption)
+                await context.bot.send_message(chat_id=COMMUNITY_CHAT_ID, text=caption, rate_limit_args=PRIORITY_BROADCAST)
 
             logger.info("Daily card posted to community chat")
         else:
@@ -705,6 +709,18 @@ async def welcome_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE)
         logger.info(f"Started 5-min intro timer for {user_name}")
 
 
+async def on_startup(app: Application):
+    """Start the /metrics endpoint"""
+    app.bot_data["metrics_server"] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+
+async def on_shutdown(app: Application):
+    """Stop the /metrics endpoint"""
+    metrics_server = app.bot_data.get("metrics_server")
+    if metrics_server:
+        await metrics_server.cleanup()
+
+
 def main():
     """Start the community bot"""
     if not COMMUNITY_BOT_TOKEN:
@@ -714,7 +730,15 @@ def main():
     logger.info("Starting community bot...")
 
     # Create application with job queue
-    app = Application.builder().token(COMMUNITY_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(COMMUNITY_BOT_TOKEN)
+        .request(InstrumentedRequest())
+        .rate_limiter(OutboundRateLimiter())
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Add handlers
     app.add_handler(CommandHandler("start", start_command))
@@ -739,6 +763,7 @@ def main():
         filters.StatusUpdate.NEW_CHAT_MEMBERS,
         welcome_new_member
     ))
+    instrument_handlers(app)
 
     # Schedule daily card at 17:00 Madrid time
     job_queue = app.job_queue
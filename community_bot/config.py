@@ -18,9 +18,17 @@ USE_VERTEX_AI = os.getenv("USE_VERTEX_AI", "false").lower() == "true"
 GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID", "")
 GCP_LOCATION = os.getenv("GCP_LOCATION", "us-central1")
 
+# Gemini calls: give up after LLM_TIMEOUT_SECONDS; sync-only calls (images) share LLM_MAX_WORKERS threads
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+
 # Chat ID where bot should be active (your community chat)
 COMMUNITY_CHAT_ID = int(os.getenv("COMMUNITY_CHAT_ID", "0"))
 
+# Prometheus-style metrics: GET /metrics on its own port (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9092"))
+
 # Bot personality - Mycelium community manager
 BOT_NAME = "Toxic"
 
@@ -6,7 +6,8 @@ import io
 from datetime import datetime
 from typing import Optional, Tuple
 
-from config import GEMINI_API_KEY
+from config import GEMINI_API_KEY, LLM_TIMEOUT_SECONDS
+from metrics import await_llm
 
 logger = logging.getLogger(__name__)
 
@@ -232,10 +233,11 @@ class DailyCardGenerator:
         try:
             if self.idea_model:
                 # Используем отдельную модель с высоким лимитом токенов
-                response = self.idea_model.generate_content(prompt)
+                model = self.idea_model
             else:
                 # Fallback на основную модель
-                response = self.gemini.model.generate_content(prompt)
+                model = self.gemini.model
+            response = await await_llm("generate_idea", model.generate_content_async(prompt), LLM_TIMEOUT_SECONDS)
 
             text = response.text.strip()
             logger.info(f"Generated idea text length: {len(text)} chars")
@@ -256,13 +258,13 @@ class DailyCardGenerator:
         logger.info(f"Generating image with {self.IMAGE_MODEL}: {image_prompt[:80]}...")
 
         try:
-            response = client.models.generate_content(
+            response = await await_llm("generate_card_image", client.aio.models.generate_content(
                 model=self.IMAGE_MODEL,
                 contents=image_prompt,
                 config=types.GenerateContentConfig(
                     response_modalities=["IMAGE"],
                 )
-            )
+            ), LLM_TIMEOUT_SECONDS)
 
             # Извлекаем изображение из ответа
             for part in response.parts:
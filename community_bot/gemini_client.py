@@ -1,8 +1,13 @@
+import asyncio
+import functools
 import logging
 import random
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from config import (
     GEMINI_API_KEY, SYSTEM_PROMPT,
-    USE_VERTEX_AI, GCP_PROJECT_ID, GCP_LOCATION
+    USE_VERTEX_AI, GCP_PROJECT_ID, GCP_LOCATION,
+    LLM_TIMEOUT_SECONDS, LLM_MAX_WORKERS
 )
 from supabase_client import (
     get_workspace_by_chat_id,
@@ -11,6 +16,7 @@ from supabase_client import (
     build_workspace_context,
     get_or_create_profile
 )
+from metrics import await_llm
 
 logger = logging.getLogger(__name__)
 
@@ -27,9 +33,16 @@ MOODS = [
 ]
 
 
+# Sync-only Gemini calls run here so they never block the event loop
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="gemini")
+
+
 class GeminiClient:
     def __init__(self):
         self.chat_histories = {}
+        # One request at a time per chat session, so its history stays in order.
+        # Weak values: a lock is dropped once no request holds or awaits it
+        self._chat_locks = weakref.WeakValueDictionary()
 
         if USE_VERTEX_AI:
             self._init_vertex_ai()
@@ -107,14 +120,15 @@ class GeminiClient:
             else:
                 prompt = f"[настроение: {mood}]\n[{user_name}]: {message}"
 
-            if self.use_vertex:
-                response = await chat.send_message_async(prompt)
-            else:
-                response = chat.send_message(prompt)
+            lock = self._chat_locks.get(chat_id)
+            if lock is None:
+                lock = self._chat_locks[chat_id] = asyncio.Lock()
+            async with lock:
+                response = await await_llm("generate_response", chat.send_message_async(prompt), LLM_TIMEOUT_SECONDS)
 
-            # Keep history manageable
-            if len(chat.history) > 40:
-                chat.history = chat.history[-40:]
+                # Keep history manageable
+                if len(chat.history) > 40:
+                    chat.history = chat.history[-40:]
 
             response_text = response.text.strip()
 
@@ -145,7 +159,12 @@ class GeminiClient:
             prompt = f"{workspace_context}\n\n[{user_name}] прислал фото и написал: {message}" if workspace_context else f"[{user_name}] прислал фото и написал: {message}"
 
             # Generate response with image (use model directly, not chat for multimodal)
-            response = self.model.generate_content([prompt, image])
+            response = await await_llm(
+                "generate_response_with_image",
+                functools.partial(self.model.generate_content, [prompt, image]),
+                LLM_TIMEOUT_SECONDS,
+                _executor
+            )
 
             response_text = response.text.strip()
 
@@ -2,6 +2,7 @@
 import logging
 from typing import Optional, Dict, List
 from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ def get_supabase():
     return _client
 
 
+@timed("supabase_latency_seconds")
 def get_workspace_by_chat_id(chat_id: int) -> Optional[Dict]:
     """Get workspace from Supabase by Telegram group ID"""
     client = get_supabase()
@@ -40,6 +42,7 @@ def get_workspace_by_chat_id(chat_id: int) -> Optional[Dict]:
         return None
 
 
+@timed("supabase_latency_seconds")
 def get_workspace_cards(workspace_id: str) -> List[Dict]:
     """Get all cards for a workspace"""
     client = get_supabase()
@@ -57,6 +60,7 @@ def get_workspace_cards(workspace_id: str) -> List[Dict]:
         return []
 
 
+@timed("supabase_latency_seconds")
 def get_ai_history(workspace_id: str, agent: str = "toxic", limit: int = 20) -> List[Dict]:
     """Get recent AI conversation history for this agent"""
     client = get_supabase()
@@ -76,6 +80,7 @@ def get_ai_history(workspace_id: str, agent: str = "toxic", limit: int = 20) ->
         return []
 
 
+@timed("supabase_latency_seconds")
 def save_ai_message(workspace_id: str, user_id: int, agent: str, role: str, content: str):
     """Save message to AI conversation history"""
     client = get_supabase()
@@ -96,6 +101,7 @@ def save_ai_message(workspace_id: str, user_id: int, agent: str, role: str, cont
         logger.error(f"Error saving AI message: {e}")
 
 
+@timed("supabase_latency_seconds")
 def get_or_create_profile(telegram_id: int, username: str = None, first_name: str = None) -> Optional[str]:
     """Get existing profile or create new one for Telegram user"""
     client = get_supabase()
@@ -8,11 +8,68 @@ CALCULATOR_URL = os.getenv("CALCULATOR_URL", "https://cards.mycelium.gg/quiz")
 MYCELIUM_APP_URL = os.getenv("MYCELIUM_APP_URL", "https://cards.mycelium.gg")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///mycelium_bot.db")
 
+# Warming sequences: how often the poller checks for due messages and how many it sends per batch
+SEQUENCE_POLL_SECONDS = int(os.getenv("SEQUENCE_POLL_SECONDS", "60"))
+SEQUENCE_BATCH_SIZE = int(os.getenv("SEQUENCE_BATCH_SIZE", "200"))
+
+# Updates handled at the same time (PTB concurrent_updates); 1 = one by one
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "64"))
+
+# Write a user's last_active at most once per USER_TOUCH_SECONDS
+USER_TOUCH_SECONDS = int(os.getenv("USER_TOUCH_SECONDS", "60"))
+
 # Supabase configuration
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
 SUPABASE_BRIDGE_URL = f"{SUPABASE_URL}/functions/v1/telegram-bot-bridge" if SUPABASE_URL else ""
 
+# Supabase bridge HTTP connection pool
+SUPABASE_POOL_LIMIT = int(os.getenv("SUPABASE_POOL_LIMIT", "100"))
+SUPABASE_POOL_PER_HOST = int(os.getenv("SUPABASE_POOL_PER_HOST", "20"))
+SUPABASE_KEEPALIVE_SECONDS = int(os.getenv("SUPABASE_KEEPALIVE_SECONDS", "60"))
+SUPABASE_DNS_CACHE_SECONDS = int(os.getenv("SUPABASE_DNS_CACHE_SECONDS", "300"))
+
+# Write-behind buffer for sync_user_status: flush when SYNC_BATCH_SIZE users are pending
+# or every SYNC_FLUSH_SECONDS; past SYNC_MAX_PENDING users the oldest update is dropped
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "100"))
+SYNC_FLUSH_SECONDS = float(os.getenv("SYNC_FLUSH_SECONDS", "2"))
+SYNC_MAX_PENDING = int(os.getenv("SYNC_MAX_PENDING", "5000"))
+
+# In-process cache for get_project_status (per telegram_id)
+STATUS_CACHE_TTL_SECONDS = float(os.getenv("STATUS_CACHE_TTL_SECONDS", "60"))
+STATUS_CACHE_MAX_SIZE = int(os.getenv("STATUS_CACHE_MAX_SIZE", "10000"))
+
+# Syndicate pulse snapshot: refreshed in the background, shared by every send
+PULSE_REFRESH_SECONDS = int(os.getenv("PULSE_REFRESH_SECONDS", "300"))
+
+# Nudge sweep: how often to look for quiz graduates due a nudge, users per bridge call.
+# The first nudge comes NUDGE_FIRST_DELAY_HOURS after the quiz, then at most once per
+# NUDGE_REPEAT_HOURS and NUDGE_MAX_PER_USER times in total
+NUDGE_SWEEP_HOURS = int(os.getenv("NUDGE_SWEEP_HOURS", "1"))
+NUDGE_PAGE_SIZE = int(os.getenv("NUDGE_PAGE_SIZE", "200"))
+NUDGE_FIRST_DELAY_HOURS = int(os.getenv("NUDGE_FIRST_DELAY_HOURS", "24"))
+NUDGE_REPEAT_HOURS = int(os.getenv("NUDGE_REPEAT_HOURS", "72"))
+NUDGE_MAX_PER_USER = int(os.getenv("NUDGE_MAX_PER_USER", "5"))
+
+# Webhook mode: set WEBHOOK_URL (public https base URL) to serve updates over a webhook
+# instead of long polling. WEBHOOK_SECRET is required and must be shared by all replicas.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("PORT", "8080"))
+# Sequence poller and nudge sweep don't claim rows: with several replicas,
+# set RUN_JOBS=0 on all but one of them or every message goes out once per replica
+RUN_JOBS = os.getenv("RUN_JOBS", "1") == "1"
+
+# Video file_id validation: parallel getFile checks at startup, then every VIDEO_REFRESH_HOURS
+VIDEO_VALIDATE_CONCURRENCY = int(os.getenv("VIDEO_VALIDATE_CONCURRENCY", "5"))
+VIDEO_REFRESH_HOURS = int(os.getenv("VIDEO_REFRESH_HOURS", "6"))
+
+# Prometheus-style metrics: GET /metrics on its own port (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9090"))
+
 # TMA (Telegram Mini App) for Vision Card
 TMA_VISION_URL = os.getenv("TMA_VISION_URL", f"{MYCELIUM_APP_URL}/vision")
 
@@ -1,4 +1,4 @@
 from .messages import *
-from .videos import VIDEOS
+from .videos import VIDEOS, video_registry, refresh_videos
 
-__all__ = ["VIDEOS"]
+__all__ = ["VIDEOS", "video_registry", "refresh_videos"]
@@ -0,0 +1,117 @@
+"""
+Render cache for outgoing messages
+
+Keyboards are built once at import (telegram objects are immutable, so one
+instance can be shared by every send). Message templates are parsed once:
+parameter-free texts are rendered up front, the others only fill their
+slots per send.
+"""
+
+from string import Formatter
+from typing import Dict
+
+from telegram import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+    WebAppInfo,
+)
+
+from config import CALCULATOR_URL, MYCELIUM_APP_URL, TMA_VISION_URL, DESKTOP_APP_URL
+
+
+class Template:
+    """str.format template parsed once; render() only fills the slots"""
+
+    __slots__ = ("source", "fields", "_parts", "_slots", "_text")
+
+    def __init__(self, source: str):
+        self.source = source
+        parts = []
+        slots = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"Template supports plain {{name}} fields only, got {{{field}!{conversion}:{spec}}}")
+            if literal:
+                parts.append(literal)
+            if field is not None:
+                slots.append((len(parts), field))
+                parts.append("")
+
+        self._parts = tuple(parts)
+        self._slots = tuple(slots)
+        self.fields = frozenset(field for _, field in slots)
+        # Parameter-free: render once (also resolves {{ }} escapes)
+        self._text = "".join(parts) if not slots else None
+
+    @property
+    def is_static(self) -> bool:
+        return self._text is not None
+
+    def render(self, **values) -> str:
+        if self._text is not None:
+            return self._text
+        parts = list(self._parts)
+        for index, field in self._slots:
+            parts[index] = str(values[field])
+        return "".join(parts)
+
+    def __str__(self) -> str:
+        return self.source
+
+
+_templates: Dict[str, Template] = {}
+
+
+def template(source: str) -> Template:
+    """Parsed template for `source` (cached)"""
+    compiled = _templates.get(source)
+    if compiled is None:
+        compiled = _templates[source] = Template(source)
+    return compiled
+
+
+def render(source: str, **values) -> str:
+    """Render a template string through the cache"""
+    return template(source).render(**values)
+
+
+def _inline(text: str, url: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([[InlineKeyboardButton(text, url=url)]])
+
+
+# === Keyboards (shared, immutable) ===
+
+LAUNCHPAD_KEYBOARD = ReplyKeyboardMarkup([[
+    KeyboardButton(
+        "🚀 Пройти Idea Launchpad",
+        web_app=WebAppInfo(url=CALCULATOR_URL)
+    )
+]], resize_keyboard=True)
+
+VISION_PHASE_KEYBOARD = _inline("✨ Начать Vision Phase", MYCELIUM_APP_URL)
+DESKTOP_KEYBOARD = _inline("🖥 Открыть на десктопе", MYCELIUM_APP_URL)
+COMMUNITY_KEYBOARD = _inline("🚀 Вступить в клуб", "https://t.me/mDAOsists")
+QUIZ_KEYBOARD = _inline("🧮 Пройти квиз", CALCULATOR_URL)
+
+START_VISION_CARD_KEYBOARD = _inline("🃏 Start Vision Card", TMA_VISION_URL)
+SEE_AUDIT_KEYBOARD = _inline("💻 See Audit on Desktop", DESKTOP_APP_URL)
+CONTINUE_BUILDING_KEYBOARD = _inline("💻 Continue Building", DESKTOP_APP_URL)
+JOIN_ACTION_KEYBOARD = _inline("🃏 Join the Action", TMA_VISION_URL)
+
+# /status call to action by Vision progress
+STATUS_CTA_KEYBOARDS: Dict[str, InlineKeyboardMarkup] = {
+    "start": _inline("🃏 Начать Vision Card", TMA_VISION_URL),
+    "continue": _inline("🃏 Продолжить Vision Card", TMA_VISION_URL),
+    "build": _inline("💻 Перейти к Build Phase", DESKTOP_APP_URL),
+}
+
+
+def status_cta_keyboard(vision_progress: int) -> InlineKeyboardMarkup:
+    if vision_progress == 0:
+        return STATUS_CTA_KEYBOARDS["start"]
+    if vision_progress < 100:
+        return STATUS_CTA_KEYBOARDS["continue"]
+    return STATUS_CTA_KEYBOARDS["build"]
+
@@ -1,6 +1,17 @@
 # Video file_ids - заполнить после загрузки видео в Telegram
 # Отправь видео боту → получи file_id из message.video.file_id
 
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+from telegram import Bot
+from telegram.error import BadRequest, TelegramError
+
+from config import VIDEO_VALIDATE_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
 VIDEOS = {
     # Welcome & Reminders (Ever)
     "ever_welcome": "BAACAgIAAxkBAAII1Wk6zffMelsXB0ogeQRzmiiSx3MGAALrjQACOOPYSSR512CPryBpNgQ",
@@ -34,3 +45,72 @@ VIDEOS = {
     # Case study
     "case_study": "BAACAgIAAxkBAAII9Wk64b-Lybp-oiAt3m6lkb3pUETbAAILjwACOOPYSZg7XruiYmSbNgQ",
 }
+
+
+class VideoRegistry:
+    """
+    VIDEOS with a negative cache of file_ids Telegram rejected
+
+    validate() checks every id with getFile (bounded concurrency) at startup
+    and from a background job; failed sends are reported with mark_bad().
+    get() returns None for known-bad ids, so handlers go straight to their
+    text fallback instead of paying for a failing send_video first.
+    """
+
+    def __init__(self, videos: Dict[str, str], concurrency: int = VIDEO_VALIDATE_CONCURRENCY):
+        self._videos = videos
+        self._concurrency = concurrency
+        self._bad: Set[str] = set()
+
+    def get(self, key: str) -> Optional[str]:
+        file_id = self._videos.get(key)
+        if not file_id or file_id in self._bad:
+            return None
+        return file_id
+
+    def mark_bad(self, file_id: str):
+        if file_id not in self._bad:
+            self._bad.add(file_id)
+            logger.warning(f"Video file_id marked bad: {file_id[:20]}...")
+
+    @property
+    def bad_keys(self):
+        return sorted(key for key, file_id in self._videos.items() if file_id in self._bad)
+
+    async def _check(self, bot: Bot, key: str, file_id: str, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                await bot.get_file(file_id)
+            except BadRequest as e:
+                # Over the 20 MB getFile limit, but the id itself is valid
+                if "too big" in str(e).lower():
+                    self._bad.discard(file_id)
+                    return
+                logger.error(f"Video {key} has a stale file_id: {e}")
+                self.mark_bad(file_id)
+                return
+            except TelegramError as e:
+                # Network trouble says nothing about the id: keep the current verdict
+                logger.warning(f"Could not validate video {key}: {e}")
+                return
+            self._bad.discard(file_id)
+
+    async def validate(self, bot: Bot) -> int:
+        """Check every file_id against the Bot API. Returns the number of bad ids"""
+        semaphore = asyncio.Semaphore(self._concurrency)
+        await asyncio.gather(*(
+            self._check(bot, key, file_id, semaphore)
+            for key, file_id in self._videos.items()
+            if file_id
+        ))
+        bad = self.bad_keys
+        logger.info(f"Validated {len(self._videos)} videos, {len(bad)} bad: {bad}")
+        return len(bad)
+
+
+video_registry = VideoRegistry(VIDEOS)
+
+
+async def refresh_videos(context):
+    """Job callback: re-validate all video file_ids"""
+    await video_registry.validate(context.bot)
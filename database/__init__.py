@@ -1,4 +1,28 @@
-from .models import User, Base
-from .db import init_db, get_session
+from .models import User, ScheduledMessage, Base
+from .db import init_db, get_session, get_async_session, close_db
+from .users import (
+    get_user,
+    get_users,
+    iter_users,
+    iter_user_pages,
+    touch_user,
+    mark_nudged,
+    save_quiz_result,
+)
 
-__all__ = ["User", "Base", "init_db", "get_session"]
+__all__ = [
+    "User",
+    "ScheduledMessage",
+    "Base",
+    "init_db",
+    "get_session",
+    "get_async_session",
+    "close_db",
+    "get_user",
+    "get_users",
+    "iter_users",
+    "iter_user_pages",
+    "touch_user",
+    "mark_nudged",
+    "save_quiz_result",
+]
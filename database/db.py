@@ -1,19 +1,74 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
 from .models import Base
 
 _engine = None
 _SessionLocal = None
+_async_engine = None
+_AsyncSessionLocal = None
+
+# Async drivers used for the non-blocking session mode
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def _async_url(database_url: str):
+    """Map a sync database URL to its async driver (aiosqlite / asyncpg)"""
+    url = make_url(database_url)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername))
+
+
+def _add_missing_columns(engine):
+    """ALTER TABLE ... ADD COLUMN for model columns an existing table lacks (added as nullable)"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def _create_missing_indexes(engine):
+    """CREATE INDEX for model indexes an existing table lacks (unique ones after dropping duplicate rows)"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    # Keep the oldest row of each duplicate group, or the index can't be built
+                    columns = ", ".join(column.name for column in index.columns)
+                    conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE id NOT IN "
+                        f"(SELECT MIN(id) FROM {table.name} GROUP BY {columns})"
+                    ))
+                index.create(conn, checkfirst=True)
 
 
 def init_db(database_url: str):
-    """Initialize database and create tables"""
-    global _engine, _SessionLocal
+    """Initialize database (sync and async engines) and create tables"""
+    global _engine, _SessionLocal, _async_engine, _AsyncSessionLocal
 
     _engine = create_engine(database_url, echo=False)
     Base.metadata.create_all(_engine)
+    # create_all skips tables that already exist: add columns and indexes introduced later
+    _add_missing_columns(_engine)
+    _create_missing_indexes(_engine)
     _SessionLocal = sessionmaker(bind=_engine)
 
+    _async_engine = create_async_engine(_async_url(database_url), echo=False)
+    _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False)
+
     return _SessionLocal()
 
 
@@ -22,3 +77,16 @@ def get_session() -> Session:
     if _SessionLocal is None:
         raise RuntimeError("Database not initialized. Call init_db() first.")
     return _SessionLocal()
+
+
+def get_async_session() -> AsyncSession:
+    """Get a new async database session (use as `async with get_async_session() as db:`)"""
+    if _AsyncSessionLocal is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    return _AsyncSessionLocal()
+
+
+async def close_db():
+    """Dispose of the async engine's connection pool"""
+    if _async_engine is not None:
+        await _async_engine.dispose()
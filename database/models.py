@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -7,6 +7,16 @@ Base = declarative_base()
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Bulk jobs filter on funnel state and page by id (keyset pagination)
+        Index('ix_users_quiz_completed_id', 'quiz_completed', 'id'),
+        Index('ix_users_vision_started_id', 'vision_started', 'id'),
+        # Sequence catch-up: who is still in sequence A / B and how far
+        Index('ix_users_quiz_completed_sequence_a', 'quiz_completed', 'sequence_a_day'),
+        Index('ix_users_vision_started_sequence_b', 'vision_started', 'sequence_b_day'),
+        # Funnel reports by signup date
+        Index('ix_users_created_at', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     telegram_id = Column(Integer, unique=True, index=True)
@@ -15,6 +25,7 @@ class User(Base):
 
     # Quiz state
     quiz_completed = Column(Boolean, default=False)
+    quiz_completed_at = Column(DateTime, nullable=True)  # Last quiz submission
     quiz_score = Column(Integer, nullable=True)
     blocker = Column(String, nullable=True)
 
@@ -26,8 +37,35 @@ class User(Base):
     last_active = Column(DateTime, default=datetime.utcnow)
 
     # Sequence tracking
-    sequence_a_day = Column(Integer, default=0)  # Last sent day in sequence A
-    sequence_b_day = Column(Integer, default=0)  # Last sent day in sequence B
+    sequence_a_day = Column(Integer, default=0)  # Last sent step of sequence A (1 = 4h, 0 = none)
+    sequence_b_day = Column(Integer, default=0)  # Last sent step of sequence B (1 = day 1, 0 = none)
+
+    # Nudge tracking (the sweep skips users nudged recently or too often)
+    last_nudged_at = Column(DateTime, nullable=True)
+    nudge_count = Column(Integer, default=0)
 
     def __repr__(self):
         return f"<User {self.telegram_id}: {self.first_name}>"
+
+
+class ScheduledMessage(Base):
+    """Pending warming-sequence message, sent by the sequence poller once due"""
+    __tablename__ = 'scheduled_messages'
+    __table_args__ = (
+        # One row per (user, sequence, day): scheduling twice can't duplicate messages.
+        # A unique index rather than a constraint, so init_db can add it to existing tables
+        Index('uq_scheduled_messages_user_sequence_day', 'telegram_id', 'sequence', 'day', unique=True),
+        # Cancel / reschedule look up (user, sequence) directly instead of scanning
+        Index('ix_scheduled_messages_user_sequence', 'telegram_id', 'sequence'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    telegram_id = Column(Integer)
+    sequence = Column(String)  # "seq_a" or "seq_b"
+    day = Column(Float)  # Key in SEQUENCE_A / SEQUENCE_B
+    score = Column(Integer, nullable=True)  # Quiz score for sequence B templates
+    due_at = Column(DateTime, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ScheduledMessage {self.sequence} day {self.day} for {self.telegram_id}>"
@@ -6,19 +6,349 @@ Async client using aiohttp to communicate with Supabase Edge Function:
 
 Actions supported:
 - sync_user_status: Upsert user data (Telegram ID, username, quiz results)
+- sync_user_status_batch: Bulk upsert of several users ({"users": [...]})
 - get_project_status: Returns passport status, vision_progress, project phase
+- get_project_status_many: Same for several users ({"telegram_ids": [...]} -> {"statuses": [...]})
 - get_syndicate_pulse: Social proof feed of recent activities
 """
 
+import asyncio
 import logging
+import time
 import aiohttp
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Awaitable, Callable, List
 
-from config import SUPABASE_BRIDGE_URL, SUPABASE_ANON_KEY
+from config import (
+    SUPABASE_BRIDGE_URL,
+    SUPABASE_ANON_KEY,
+    SUPABASE_POOL_LIMIT,
+    SUPABASE_POOL_PER_HOST,
+    SUPABASE_KEEPALIVE_SECONDS,
+    SUPABASE_DNS_CACHE_SECONDS,
+    SYNC_BATCH_SIZE,
+    SYNC_FLUSH_SECONDS,
+    SYNC_MAX_PENDING,
+    STATUS_CACHE_TTL_SECONDS,
+    STATUS_CACHE_MAX_SIZE,
+    PULSE_REFRESH_SECONDS,
+)
+from services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
+class ProjectStatusCache:
+    """
+    Bounded TTL + LRU cache for get_project_status, keyed by telegram_id
+
+    Concurrent misses for the same user share one in-flight bridge request.
+    Empty results (unknown user, bridge error) are not cached.
+    """
+
+    def __init__(self, ttl: float = STATUS_CACHE_TTL_SECONDS, max_size: int = STATUS_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # telegram_id -> (expires_at, status)
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get(self, telegram_id: int, load: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Return cached status or load it (once, however many callers are waiting)"""
+        entry = self._entries.get(telegram_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(telegram_id)
+                self.hits += 1
+                return entry[1]
+            del self._entries[telegram_id]
+
+        inflight = self._inflight.get(telegram_id)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[telegram_id] = future
+        status = None
+        try:
+            status = await load()
+        finally:
+            future.set_result(status)
+            # Skip storing if the entry was invalidated while loading
+            if self._inflight.get(telegram_id) is future:
+                del self._inflight[telegram_id]
+                if status is not None:
+                    self.put(telegram_id, status)
+        return status
+
+    def peek(self, telegram_id: int) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached status without loading it"""
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, telegram_id: int, status: Dict[str, Any]):
+        self._entries[telegram_id] = (time.monotonic() + self.ttl, status)
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        """Drop cached status for a user (and detach any in-flight load)"""
+        self._entries.pop(telegram_id, None)
+        self._inflight.pop(telegram_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+class UserStatusBuffer:
+    """
+    Coalescing write-behind buffer for sync_user_status upserts
+
+    Pending updates are merged per telegram_id (last write wins per field)
+    and sent to the bridge in bulk once SYNC_BATCH_SIZE users are pending or
+    every SYNC_FLUSH_SECONDS. put() never waits: past SYNC_MAX_PENDING users
+    the oldest pending update is dropped (counted in stats()), so a bridge
+    outage can't stall the handlers. After a failed batch the next attempt
+    waits twice as long (up to MAX_BACKOFF_SECONDS).
+
+    If the bridge rejects sync_user_status_batch (action not deployed) the
+    batch is retried as per-user sync_user_status calls, and once those
+    succeed the buffer keeps using them.
+    """
+
+    MAX_BACKOFF_SECONDS = 60
+
+    def __init__(
+        self,
+        client: "SupabaseClient",
+        batch_size: int = SYNC_BATCH_SIZE,
+        flush_interval: float = SYNC_FLUSH_SECONDS,
+        max_pending: int = SYNC_MAX_PENDING
+    ):
+        self._client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._use_batch = True
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def put(self, telegram_id: int, fields: Dict[str, Any]):
+        """Queue fields for a user, merging with anything already pending (never waits)"""
+        merged = self._pending.setdefault(telegram_id, {"telegram_id": telegram_id})
+        merged.update({k: v for k, v in fields.items() if v is not None})
+        self._shed()
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _shed(self):
+        """Drop the oldest pending users beyond max_pending"""
+        excess = len(self._pending) - self.max_pending
+        if excess <= 0:
+            return
+        for telegram_id in list(self._pending)[:excess]:
+            del self._pending[telegram_id]
+        # Log the first drop and then every 1000th, not every put during an outage
+        if self.dropped == 0 or (self.dropped + excess) // 1000 > self.dropped // 1000:
+            logger.warning(f"Supabase sync buffer full, dropping the oldest updates ({self.dropped + excess} so far)")
+        self.dropped += excess
+
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        # Failed records go in front (oldest); newer fields queued meanwhile win
+        requeued = {record["telegram_id"]: record for record in batch}
+        for telegram_id, fields in self._pending.items():
+            requeued[telegram_id] = {**requeued.get(telegram_id, {}), **fields}
+        self._pending = requeued
+        self._shed()
+
+    async def _send_each(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send records one sync_user_status call each; returns the ones that failed"""
+        results = await asyncio.gather(*(
+            self._client._request("sync_user_status", record) for record in batch
+        ))
+        return [record for record, result in zip(batch, results) if result is None]
+
+    async def _send(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send a batch, falling back to per-user calls; returns the records that failed"""
+        if self._use_batch:
+            if await self._client._request("sync_user_status_batch", {"users": batch}) is not None:
+                return []
+            logger.warning("Supabase sync_user_status_batch failed, retrying per user")
+
+        failed = await self._send_each(batch)
+        if self._use_batch and len(failed) < len(batch):
+            logger.warning("Supabase sync_user_status_batch unavailable, syncing users one by one")
+            self._use_batch = False
+        return failed
+
+    async def flush(self) -> bool:
+        """Send everything pending right now, in batches; False if a batch failed"""
+        ok = True
+        # Only what is pending now: failed batches go back for the next run
+        for _ in range(-(-len(self._pending) // self.batch_size)):
+            if not self._pending:
+                break
+            batch_ids = list(self._pending)[:self.batch_size]
+            batch = [self._pending.pop(telegram_id) for telegram_id in batch_ids]
+
+            try:
+                failed = await self._send(batch)
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+
+            # Drop statuses that may have been cached before this write landed
+            for record in batch:
+                self._client.status_cache.invalidate(record["telegram_id"])
+            if failed:
+                logger.error(f"Supabase sync failed, re-queueing {len(failed)} of {len(batch)} users")
+                self._requeue(failed)
+                ok = False
+                break
+            logger.info(f"Synced {len(batch)} users to Supabase")
+
+        return ok
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "dropped": self.dropped, "batch_action": self._use_batch}
+
+    async def _run(self):
+        delay = self.flush_interval
+        while not self._stopping.is_set():
+            # While backing off only stop() cuts the wait short, not new updates
+            event = self._wakeup if delay == self.flush_interval else self._stopping
+            try:
+                await asyncio.wait_for(event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping.is_set():
+                break
+            self._wakeup.clear()
+            try:
+                ok = await self.flush()
+            except Exception as e:
+                logger.error(f"Supabase sync buffer flush error: {e}")
+                ok = False
+            delay = self.flush_interval if ok else min(delay * 2, self.MAX_BACKOFF_SECONDS)
+
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the flush task finish its current flush, then send whatever is still pending"""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+class PulseSnapshot:
+    """
+    One in-memory syndicate pulse shared by every sender
+
+    A background task refetches it every PULSE_REFRESH_SECONDS. get() serves
+    the current snapshot right away; if it has gone stale (refresher failing)
+    a refresh is started in the background and the stale copy is served
+    meanwhile. Only a read with no snapshot at all waits for the bridge.
+    A failed fetch keeps the previous snapshot.
+    """
+
+    # Minimum gap between on-demand fetch attempts while the bridge is failing
+    RETRY_SECONDS = 30
+
+    def __init__(self, client: "SupabaseClient", refresh_interval: float = PULSE_REFRESH_SECONDS, limit: int = 3):
+        self._client = client
+        self.refresh_interval = refresh_interval
+        self.limit = limit
+        self._pulse: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._attempted_at = float("-inf")
+        self._fetching: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the snapshot was fetched (None if there is none)"""
+        return time.monotonic() - self._fetched_at if self._pulse is not None else None
+
+    async def _fetch(self):
+        pulse = await self._client.get_syndicate_pulse(limit=self.limit)
+        if pulse:
+            self._pulse = pulse
+            self._fetched_at = time.monotonic()
+        else:
+            logger.warning("Syndicate pulse refresh failed, keeping the previous snapshot")
+
+    def _start_fetch(self) -> asyncio.Task:
+        """Start a fetch unless one is already running"""
+        if self._fetching is None or self._fetching.done():
+            self._attempted_at = time.monotonic()
+            self._fetching = asyncio.create_task(self._fetch())
+        return self._fetching
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        stale = self._pulse is None or now - self._fetched_at >= self.refresh_interval
+        if stale and now - self._attempted_at >= min(self.refresh_interval, self.RETRY_SECONDS):
+            self._start_fetch()
+
+        if self._pulse is None and self._fetching is not None and not self._fetching.done():
+            await asyncio.shield(self._fetching)
+        return self._pulse
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.shield(self._start_fetch())
+            except Exception as e:
+                logger.error(f"Syndicate pulse refresh error: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        """Start the background refresher"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._fetching):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._fetching = None
+
+
 class SupabaseClient:
     """Async client for Supabase Edge Function bridge"""
 
@@ -29,6 +359,11 @@ class SupabaseClient:
             "Content-Type": "application/json"
         }
         self._enabled = bool(SUPABASE_BRIDGE_URL and SUPABASE_ANON_KEY)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._status_buffer = UserStatusBuffer(self)
+        self.status_cache = ProjectStatusCache()
+        self.pulse = PulseSnapshot(self)
 
         if not self._enabled:
             logger.warning("Supabase not configured - running in local-only mode")
@@ -37,6 +372,68 @@ class SupabaseClient:
     def is_enabled(self) -> bool:
         return self._enabled
 
+    async def start(self):
+        """Open the shared keep-alive HTTP session (call once on startup)"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=SUPABASE_POOL_LIMIT,
+            limit_per_host=SUPABASE_POOL_PER_HOST,
+            keepalive_timeout=SUPABASE_KEEPALIVE_SECONDS,
+            ttl_dns_cache=SUPABASE_DNS_CACHE_SECONDS,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+        self._status_buffer.start()
+        self.pulse.start()
+        logger.info("Supabase HTTP session opened")
+
+    async def close(self):
+        """Flush queued upserts and close the shared HTTP session (call once on shutdown)"""
+        if self._enabled:
+            await self.pulse.stop()
+            await self._status_buffer.stop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Supabase HTTP session closed")
+        self._session = None
+
+    def _record(self, action: str, started: float, ok: bool):
+        """Update latency counters for an action"""
+        elapsed = time.perf_counter() - started
+        metrics.observe("supabase_latency_seconds", elapsed, op=action)
+        elapsed_ms = elapsed * 1000
+        stats = self._stats.setdefault(action, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if not ok:
+            stats["errors"] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-action latency counters
+
+        Returns:
+            {action: {"count", "errors", "total_ms", "max_ms", "avg_ms"}}
+        """
+        return {
+            action: {**stats, "avg_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0}
+            for action, stats in self._stats.items()
+        }
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit / miss counters of the get_project_status cache"""
+        return self.status_cache.stats()
+
+    def get_sync_stats(self) -> Dict[str, Any]:
+        """Pending / dropped counters of the sync_user_status write-behind buffer"""
+        return self._status_buffer.stats()
+
     async def _request(self, action: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Make async request to Supabase bridge"""
         if not self._enabled:
@@ -45,31 +442,33 @@ class SupabaseClient:
 
         payload = {"action": action, **data}
 
+        if self._session is None or self._session.closed:
+            await self.start()
+
+        started = time.perf_counter()
+        ok = False
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.bridge_url,
-                    json=payload,
-                    headers=self.headers,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        logger.info(f"Supabase {action} success: {result}")
-                        return result
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Supabase {action} failed ({response.status}): {error_text}")
-                        return None
+            async with self._session.post(self.bridge_url, json=payload) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    ok = True
+                    logger.info(f"Supabase {action} success: {result}")
+                    return result
+                else:
+                    error_text = await response.text()
+                    logger.error(f"Supabase {action} failed ({response.status}): {error_text}")
+                    return None
         except aiohttp.ClientError as e:
             logger.error(f"Supabase connection error for {action}: {e}")
             return None
         except Exception as e:
             logger.error(f"Supabase unexpected error for {action}: {e}")
             return None
+        finally:
+            self._record(action, started, ok)
 
-    async def sync_user_status(
-        self,
+    @staticmethod
+    def _user_status_data(
         telegram_id: int,
         username: Optional[str] = None,
         first_name: Optional[str] = None,
@@ -77,19 +476,8 @@ class SupabaseClient:
         assigned_character: Optional[str] = None,
         quiz_score: Optional[int] = None,
         onboarding_step: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
-        """
-        Sync user data to Supabase (upsert)
-
-        Args:
-            telegram_id: Telegram user ID
-            username: Telegram username
-            first_name: User's first name
-            quiz_blocker: Detected blocker (e.g., "Страх выбора")
-            assigned_character: Character key (e.g., "prisma", "ever")
-            quiz_score: Quiz score (0-100)
-            onboarding_step: Current step (e.g., "quiz_complete", "vision_started")
-        """
+    ) -> Dict[str, Any]:
+        """Build the sync_user_status payload"""
         data = {
             "telegram_id": telegram_id,
             "username": username,
@@ -106,11 +494,68 @@ class SupabaseClient:
         if onboarding_step:
             data["onboarding_step"] = onboarding_step
 
+        return data
+
+    async def sync_user_status(
+        self,
+        telegram_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        quiz_blocker: Optional[str] = None,
+        assigned_character: Optional[str] = None,
+        quiz_score: Optional[int] = None,
+        onboarding_step: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Sync user data to Supabase (upsert)
+
+        Args:
+            telegram_id: Telegram user ID
+            username: Telegram username
+            first_name: User's first name
+            quiz_blocker: Detected blocker (e.g., "Страх выбора")
+            assigned_character: Character key (e.g., "prisma", "ever")
+            quiz_score: Quiz score (0-100)
+            onboarding_step: Current step (e.g., "quiz_complete", "vision_started")
+        """
+        data = self._user_status_data(
+            telegram_id, username, first_name,
+            quiz_blocker, assigned_character, quiz_score, onboarding_step
+        )
+        self.status_cache.invalidate(telegram_id)
         return await self._request("sync_user_status", data)
 
+    async def queue_user_status(
+        self,
+        telegram_id: int,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        quiz_blocker: Optional[str] = None,
+        assigned_character: Optional[str] = None,
+        quiz_score: Optional[int] = None,
+        onboarding_step: Optional[str] = None
+    ):
+        """
+        Queue a sync_user_status upsert for the write-behind buffer
+
+        Returns as soon as the update is queued; it is merged with other
+        pending updates for the same user and flushed in bulk.
+        Same arguments as sync_user_status.
+        """
+        if not self._enabled:
+            logger.debug("Supabase disabled, skipping queued sync_user_status")
+            return
+
+        data = self._user_status_data(
+            telegram_id, username, first_name,
+            quiz_blocker, assigned_character, quiz_score, onboarding_step
+        )
+        self.status_cache.invalidate(telegram_id)
+        self._status_buffer.put(telegram_id, data)
+
     async def get_project_status(self, telegram_id: int) -> Optional[Dict[str, Any]]:
         """
-        Get user's project status from Supabase
+        Get user's project status from Supabase (cached for STATUS_CACHE_TTL_SECONDS)
 
         Returns:
             {
@@ -122,7 +567,42 @@ class SupabaseClient:
                 "quiz_blocker": str
             }
         """
-        return await self._request("get_project_status", {"telegram_id": telegram_id})
+        return await self.status_cache.get(
+            telegram_id,
+            lambda: self._request("get_project_status", {"telegram_id": telegram_id})
+        )
+
+    async def get_project_status_many(self, telegram_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Get project statuses of several users with one bridge call
+
+        Cached statuses are served locally, only the rest go to the bridge.
+        Users without a status are missing from the result.
+        """
+        statuses = {}
+        missing = []
+        for telegram_id in telegram_ids:
+            status = self.status_cache.peek(telegram_id)
+            if status is not None:
+                statuses[telegram_id] = status
+            else:
+                missing.append(telegram_id)
+
+        if not missing:
+            return statuses
+
+        self.status_cache.misses += len(missing)
+        result = await self._request("get_project_status_many", {"telegram_ids": missing})
+
+        for status in (result or {}).get("statuses", []):
+            telegram_id = status.get("telegram_id")
+            if telegram_id is None:
+                continue
+            telegram_id = int(telegram_id)
+            self.status_cache.put(telegram_id, status)
+            statuses[telegram_id] = status
+
+        return statuses
 
     async def get_syndicate_pulse(self, limit: int = 5) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,193 @@
+"""
+Async User lookups for handlers
+
+Every function opens its own AsyncSession, so callers never block the
+event loop on a query or a commit. Writes are single-statement upserts.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config import USER_TOUCH_SECONDS
+from services.metrics import timed
+from .db import get_async_session
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# telegram_id -> monotonic time of the last last_active write, oldest first.
+# Bounded: past _MAX_TOUCHED users the oldest is forgotten (it just gets written again)
+_touched: "OrderedDict[int, float]" = OrderedDict()
+_MAX_TOUCHED = 10000
+
+
+@timed("db_latency_seconds")
+async def get_user(telegram_id: int) -> Optional[User]:
+    """Get user by Telegram ID"""
+    async with get_async_session() as db:
+        return await db.scalar(select(User).where(User.telegram_id == telegram_id))
+
+
+@timed("db_latency_seconds")
+async def get_users(telegram_ids: Iterable[int]) -> Dict[int, User]:
+    """Get several users in one query, keyed by Telegram ID"""
+    ids = set(telegram_ids)
+    if not ids:
+        return {}
+    async with get_async_session() as db:
+        result = await db.scalars(select(User).where(User.telegram_id.in_(ids)))
+        return {u.telegram_id: u for u in result}
+
+
+async def iter_user_pages(
+    where: Optional[ColumnElement] = None,
+    page_size: int = 500
+) -> AsyncIterator[List[User]]:
+    """
+    Stream pages of users matching `where`, in id order
+
+    Keyset pagination: each page is one `id > last_id ... LIMIT page_size`
+    query in its own session, so memory stays flat and the cost of a page
+    doesn't grow with its position.
+    """
+    last_id = 0
+    while True:
+        query = select(User).where(User.id > last_id)
+        if where is not None:
+            query = query.where(where)
+
+        async with get_async_session() as db:
+            page = (await db.scalars(query.order_by(User.id).limit(page_size))).all()
+
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1].id
+
+
+async def iter_users(
+    where: Optional[ColumnElement] = None,
+    page_size: int = 500
+) -> AsyncIterator[User]:
+    """Stream users matching `where` one by one (see iter_user_pages)"""
+    async for page in iter_user_pages(where, page_size):
+        for user in page:
+            yield user
+
+
+def _insert(dialect: str):
+    """Dialect INSERT with ON CONFLICT support, None if the dialect has none"""
+    if dialect == "sqlite":
+        return sqlite_insert(User)
+    if dialect == "postgresql":
+        return postgresql_insert(User)
+    return None
+
+
+async def _upsert(telegram_id: int, username: Optional[str], first_name: Optional[str], **fields):
+    """
+    Create the user or set `fields` on it in one INSERT ... ON CONFLICT DO UPDATE
+
+    username / first_name are only written for new users. Other dialects
+    fall back to a SELECT, then an UPDATE or an INSERT.
+    """
+    async with get_async_session() as db:
+        insert = _insert(db.bind.dialect.name)
+        if insert is None:
+            user = await db.scalar(select(User).where(User.telegram_id == telegram_id))
+            if user is None:
+                db.add(User(telegram_id=telegram_id, username=username, first_name=first_name, **fields))
+            else:
+                for key, value in fields.items():
+                    setattr(user, key, value)
+            await db.commit()
+            return
+
+        stmt = insert.values(
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name,
+            **fields
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={key: stmt.excluded[key] for key in fields}
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+def _should_touch(telegram_id: int) -> bool:
+    """True at most once per USER_TOUCH_SECONDS per user (in this process)"""
+    now = time.monotonic()
+    last = _touched.get(telegram_id)
+    if last is not None and now - last < USER_TOUCH_SECONDS:
+        return False
+
+    _touched[telegram_id] = now
+    _touched.move_to_end(telegram_id)
+    while len(_touched) > _MAX_TOUCHED:
+        _touched.popitem(last=False)
+    return True
+
+
+@timed("db_latency_seconds")
+async def touch_user(
+    telegram_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None
+):
+    """
+    Create user if needed and update last_active (returns nothing; see get_user)
+
+    Coalesced: a user written less than USER_TOUCH_SECONDS ago is skipped.
+    """
+    if not _should_touch(telegram_id):
+        return
+    try:
+        await _upsert(telegram_id, username, first_name, last_active=datetime.utcnow())
+    except Exception:
+        _touched.pop(telegram_id, None)
+        raise
+
+
+@timed("db_latency_seconds")
+async def mark_nudged(telegram_ids: Iterable[int]):
+    """Record a nudge sent to each user (last_nudged_at, nudge_count) in one UPDATE"""
+    ids = set(telegram_ids)
+    if not ids:
+        return
+    async with get_async_session() as db:
+        await db.execute(
+            update(User)
+            .where(User.telegram_id.in_(ids))
+            .values(last_nudged_at=datetime.utcnow(), nudge_count=func.coalesce(User.nudge_count, 0) + 1)
+        )
+        await db.commit()
+
+
+@timed("db_latency_seconds")
+async def save_quiz_result(
+    telegram_id: int,
+    score: int,
+    blocker: str,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None
+):
+    """Mark quiz as completed for user (creating the user if needed)"""
+    await _upsert(
+        telegram_id, username, first_name,
+        quiz_completed=True,
+        quiz_completed_at=datetime.utcnow(),
+        quiz_score=score,
+        blocker=blocker
+    )
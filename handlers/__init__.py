@@ -2,12 +2,13 @@ from .start import start_handler
 from .quiz import quiz_result_handler, determine_blocker, BLOCKER_TO_CHARACTER
 from .video import video_handler, download_all_handler
 from .status import status_handler
-from .nudger import check_and_nudge_user, schedule_nudge_check, send_syndicate_pulse
+from .nudger import check_and_nudge_user, nudge_sweep, send_syndicate_pulse, broadcast_syndicate_pulse
 from .sequences import (
     send_sequence_a_message,
     send_sequence_b_message,
     schedule_sequence_a,
     schedule_sequence_b,
+    process_due_sequences,
     cancel_jobs,
     SEQUENCE_A,
     SEQUENCE_B,
@@ -20,14 +21,16 @@ __all__ = [
     "download_all_handler",
     "status_handler",
     "check_and_nudge_user",
-    "schedule_nudge_check",
+    "nudge_sweep",
     "send_syndicate_pulse",
+    "broadcast_syndicate_pulse",
     "determine_blocker",
     "BLOCKER_TO_CHARACTER",
     "send_sequence_a_message",
     "send_sequence_b_message",
     "schedule_sequence_a",
     "schedule_sequence_b",
+    "process_due_sequences",
     "cancel_jobs",
     "SEQUENCE_A",
     "SEQUENCE_B",
@@ -7,17 +7,33 @@ Checks user status from Supabase and sends contextual messages:
 - User has build_progress > 0: Tech Priest continuation nudge
 """
 
+import asyncio
 import logging
-from datetime import timedelta
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from telegram import InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from config import TMA_VISION_URL, DESKTOP_APP_URL
+from sqlalchemy import and_, func, or_
+
+from config import NUDGE_PAGE_SIZE, NUDGE_FIRST_DELAY_HOURS, NUDGE_REPEAT_HOURS, NUDGE_MAX_PER_USER
+from database import iter_user_pages, mark_nudged, User
 from database.supabase_client import get_supabase_client
-from content.videos import VIDEOS
+from content.render import (
+    render,
+    START_VISION_CARD_KEYBOARD,
+    SEE_AUDIT_KEYBOARD,
+    CONTINUE_BUILDING_KEYBOARD,
+    JOIN_ACTION_KEYBOARD,
+)
+from services.media import send_video_or_text
+from services.outbound import PRIORITY_DRIP, PRIORITY_BROADCAST
 
 logger = logging.getLogger(__name__)
 
+# (pulse snapshot, rendered message) of the last pulse sent
+_pulse_rendered: Tuple[Optional[Dict[str, Any]], Optional[str]] = (None, None)
+
 # Character-specific nudge messages
 NUDGE_MESSAGES = {
     # When vision_progress = 0 (hasn't started)
@@ -97,6 +113,70 @@ NUDGE_MESSAGES = {
 }
 
 
+def build_nudge(status: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, Optional[str], InlineKeyboardMarkup]]:
+    """
+    Pick the nudge for a project status
+
+    Returns (kind, text, video_key, keyboard) or None if no nudge applies.
+    """
+    if not status:
+        return None
+
+    char_key = status.get("assigned_character")
+    blocker = status.get("quiz_blocker", "страх")
+    vision_progress = status.get("vision_progress", 0)
+    build_progress = status.get("build_progress", 0)
+
+    # No character assigned = hasn't completed quiz
+    if not char_key:
+        return None
+
+    # CASE 1: Vision not started
+    if vision_progress == 0:
+        templates = NUDGE_MESSAGES["start_vision"]
+        message = render(templates.get(char_key, templates["ever"]), blocker=blocker)
+        # Character video
+        return "start_vision", message, f"{char_key}_nudge", START_VISION_CARD_KEYBOARD
+
+    # CASE 2: Vision complete (100%)
+    if vision_progress >= 100 and build_progress == 0:
+        # Toxic video for audit reveal
+        return "vision_complete", NUDGE_MESSAGES["vision_complete"], "toxic_audit", SEE_AUDIT_KEYBOARD
+
+    # CASE 3: Building in progress
+    if build_progress > 0 and build_progress < 100:
+        message = render(NUDGE_MESSAGES["continue_build"], build_progress=build_progress)
+        return "continue_build", message, None, CONTINUE_BUILDING_KEYBOARD
+
+    return None
+
+
+async def send_nudge(
+    context: ContextTypes.DEFAULT_TYPE,
+    chat_id: int,
+    nudge: Tuple[str, str, Optional[str], InlineKeyboardMarkup]
+) -> bool:
+    """Send a nudge built by build_nudge (drip priority). Returns True if sent"""
+    kind, message, video_key, keyboard = nudge
+
+    try:
+        await send_video_or_text(
+            context.bot,
+            chat_id,
+            video_key,
+            message,
+            reply_markup=keyboard,
+            rate_limit_args=PRIORITY_DRIP
+        )
+
+        logger.info(f"Sent {kind} nudge to {chat_id}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Nudge error for {chat_id}: {e}")
+        return False
+
+
 async def check_and_nudge_user(
     context: ContextTypes.DEFAULT_TYPE,
     telegram_id: int,
@@ -105,9 +185,8 @@ async def check_and_nudge_user(
     """
     Check user status and send appropriate nudge message
 
-    Called from:
-    - Scheduled job (daily check)
-    - After user completes certain actions
+    Called after user completes certain actions; the daily check
+    for everyone is nudge_sweep.
     """
     supabase = get_supabase_client()
 
@@ -115,143 +194,77 @@ async def check_and_nudge_user(
         logger.debug("Supabase not enabled, skipping nudge")
         return
 
-    try:
-        status = await supabase.get_project_status(telegram_id)
-
-        if not status:
-            logger.debug(f"No status for user {telegram_id}")
-            return
-
-        char_key = status.get("assigned_character")
-        blocker = status.get("quiz_blocker", "страх")
-        vision_progress = status.get("vision_progress", 0)
-        build_progress = status.get("build_progress", 0)
-
-        # No character assigned = hasn't completed quiz
-        if not char_key:
-            logger.debug(f"User {telegram_id} has no character, skip nudge")
-            return
-
-        # CASE 1: Vision not started
-        if vision_progress == 0:
-            templates = NUDGE_MESSAGES["start_vision"]
-            message = templates.get(char_key, templates["ever"]).format(blocker=blocker)
-
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🃏 Start Vision Card", url=TMA_VISION_URL)]
-            ])
-
-            # Try to send character video
-            video_key = f"{char_key}_nudge"
-            video_id = VIDEOS.get(video_key)
-
-            if video_id:
-                await context.bot.send_video(
-                    chat_id=chat_id,
-                    video=video_id,
-                    caption=message,
-                    reply_markup=keyboard
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    reply_markup=keyboard
-                )
-
-            logger.info(f"Sent start_vision nudge to {telegram_id}")
-            return
-
-        # CASE 2: Vision complete (100%)
-        if vision_progress >= 100 and build_progress == 0:
-            message = NUDGE_MESSAGES["vision_complete"]
-
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("💻 See Audit on Desktop", url=DESKTOP_APP_URL)]
-            ])
-
-            # Toxic video for audit reveal
-            video_id = VIDEOS.get("toxic_audit")
-
-            if video_id:
-                await context.bot.send_video(
-                    chat_id=chat_id,
-                    video=video_id,
-                    caption=message,
-                    reply_markup=keyboard
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=message,
-                    reply_markup=keyboard
-                )
-
-            logger.info(f"Sent vision_complete nudge to {telegram_id}")
-            return
-
-        # CASE 3: Building in progress
-        if build_progress > 0 and build_progress < 100:
-            message = NUDGE_MESSAGES["continue_build"].format(build_progress=build_progress)
-
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("💻 Continue Building", url=DESKTOP_APP_URL)]
-            ])
-
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                reply_markup=keyboard
-            )
-
-            logger.info(f"Sent continue_build nudge to {telegram_id}")
-            return
+    status = await supabase.get_project_status(telegram_id)
+    nudge = build_nudge(status)
 
+    if not nudge:
         logger.debug(f"No nudge condition met for user {telegram_id}")
+        return
 
-    except Exception as e:
-        logger.error(f"Nudge error for {telegram_id}: {e}")
-
-
-async def schedule_nudge_check(context: ContextTypes.DEFAULT_TYPE, telegram_id: int, chat_id: int, delay_hours: int = 24):
-    """Schedule a nudge check for later"""
-    job_name = f"nudge_{telegram_id}"
-
-    # Remove existing nudge job if any
-    current_jobs = context.job_queue.get_jobs_by_name(job_name)
-    for job in current_jobs:
-        job.schedule_removal()
-
-    # Schedule new nudge
-    context.job_queue.run_once(
-        callback=lambda ctx: check_and_nudge_user(ctx, telegram_id, chat_id),
-        when=timedelta(hours=delay_hours),
-        name=job_name,
-        data={"telegram_id": telegram_id, "chat_id": chat_id}
-    )
-
-    logger.info(f"Scheduled nudge for {telegram_id} in {delay_hours}h")
+    if await send_nudge(context, chat_id, nudge):
+        await mark_nudged([telegram_id])
 
 
-async def send_syndicate_pulse(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
-    """Send social proof message with recent syndicate activity"""
+async def nudge_sweep(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Nudge the quiz graduates who are due, one page at a time.
+
+    Runs as a repeating job. A user is due once the quiz is at least
+    NUDGE_FIRST_DELAY_HOURS old (quiz_completed_at; unknown for users who
+    took it before the column existed), if not nudged in the last
+    NUDGE_REPEAT_HOURS and nudged fewer than NUDGE_MAX_PER_USER times
+    (last_nudged_at / nudge_count, so restarts don't matter). Each page of
+    NUDGE_PAGE_SIZE users costs one get_project_status_many bridge call;
+    the nudges of a page are sent concurrently and paced by the outbound
+    rate limiter, then recorded in one UPDATE.
+    """
     supabase = get_supabase_client()
 
     if not supabase.is_enabled:
+        logger.debug("Supabase not enabled, skipping nudge sweep")
         return
 
-    try:
-        pulse = await supabase.get_syndicate_pulse(limit=3)
-
-        if not pulse:
-            return
-
-        activities = pulse.get("activities", [])
-        active_today = pulse.get("active_today", 0)
-
-        if not activities:
-            return
+    pages = 0
+    sent = 0
+    now = datetime.utcnow()
+    due = and_(
+        User.quiz_completed.is_(True),
+        or_(User.quiz_completed_at.is_(None), User.quiz_completed_at < now - timedelta(hours=NUDGE_FIRST_DELAY_HOURS)),
+        or_(User.last_nudged_at.is_(None), User.last_nudged_at < now - timedelta(hours=NUDGE_REPEAT_HOURS)),
+        func.coalesce(User.nudge_count, 0) < NUDGE_MAX_PER_USER
+    )
 
+    async for page in iter_user_pages(due, page_size=NUDGE_PAGE_SIZE):
+        pages += 1
+
+        statuses = await supabase.get_project_status_many([row.telegram_id for row in page])
+        nudges = [
+            (row.telegram_id, nudge)
+            for row in page
+            if (nudge := build_nudge(statuses.get(row.telegram_id)))
+        ]
+        results = await asyncio.gather(*(
+            send_nudge(context, telegram_id, nudge) for telegram_id, nudge in nudges
+        ))
+        await mark_nudged(telegram_id for (telegram_id, _), ok in zip(nudges, results) if ok)
+        sent += sum(results)
+
+    logger.info(f"Nudge sweep: sent {sent} nudges over {pages} pages")
+
+
+def _pulse_message(pulse: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Format the pulse message (once per snapshot)"""
+    global _pulse_rendered
+    if not pulse:
+        return None
+    if _pulse_rendered[0] is pulse:
+        return _pulse_rendered[1]
+
+    activities = pulse.get("activities", [])
+    active_today = pulse.get("active_today", 0)
+
+    message = None
+    if activities:
         # Format activities
         activity_lines = []
         for act in activities[:3]:
@@ -260,24 +273,54 @@ async def send_syndicate_pulse(context: ContextTypes.DEFAULT_TYPE, chat_id: int)
             time_ago = act.get("time_ago", "recently")
             activity_lines.append(f"• {user} {action} ({time_ago})")
 
-        activities_text = "\n".join(activity_lines)
-
-        message = NUDGE_MESSAGES["syndicate_pulse"].format(
-            activities=activities_text,
+        message = render(
+            NUDGE_MESSAGES["syndicate_pulse"],
+            activities="\n".join(activity_lines),
             active_today=active_today
         )
 
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🃏 Join the Action", url=TMA_VISION_URL)]
-        ])
+    _pulse_rendered = (pulse, message)
+    return message
 
+
+async def _send_pulse(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message: str) -> bool:
+    try:
         await context.bot.send_message(
             chat_id=chat_id,
             text=message,
-            reply_markup=keyboard
+            reply_markup=JOIN_ACTION_KEYBOARD,
+            rate_limit_args=PRIORITY_BROADCAST
         )
-
         logger.info(f"Sent syndicate pulse to {chat_id}")
-
+        return True
     except Exception as e:
-        logger.error(f"Syndicate pulse error: {e}")
+        logger.error(f"Syndicate pulse error for {chat_id}: {e}")
+        return False
+
+
+async def send_syndicate_pulse(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    """Send social proof message with recent syndicate activity"""
+    supabase = get_supabase_client()
+
+    if not supabase.is_enabled:
+        return
+
+    # Shared snapshot: no bridge call per chat
+    message = _pulse_message(await supabase.pulse.get())
+    if message:
+        await _send_pulse(context, chat_id, message)
+
+
+async def broadcast_syndicate_pulse(context: ContextTypes.DEFAULT_TYPE, chat_ids: Iterable[int]) -> int:
+    """Send the current pulse to many chats (paced by the rate limiter). Returns the number sent"""
+    supabase = get_supabase_client()
+
+    if not supabase.is_enabled:
+        return 0
+
+    message = _pulse_message(await supabase.pulse.get())
+    if not message:
+        return 0
+
+    results = await asyncio.gather(*(_send_pulse(context, chat_id, message) for chat_id in chat_ids))
+    return sum(results)
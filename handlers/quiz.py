@@ -1,18 +1,21 @@
 import json
 import logging
 import traceback
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from config import MYCELIUM_APP_URL
 from content.messages import RESULT_HIGH_SCORE, RESULT_WITH_BLOCKER
-from content.videos import VIDEOS
-from database import get_session, User
+from content.render import template, VISION_PHASE_KEYBOARD, DESKTOP_KEYBOARD, COMMUNITY_KEYBOARD
+from database import save_quiz_result
 from database.supabase_client import get_supabase_client
+from services.media import send_video_or_text
 from .sequences import cancel_jobs, schedule_sequence_b
 
 logger = logging.getLogger(__name__)
 
+HIGH_SCORE = template(RESULT_HIGH_SCORE)
+WITH_BLOCKER = template(RESULT_WITH_BLOCKER)
+
 # Blockers mapping to characters
 BLOCKER_TO_CHARACTER = {
     "Страх выбора": ("prisma", "Prisma"),
@@ -66,9 +69,7 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         logger.error(f"Failed to parse web app data: {e}")
         await update.message.reply_text(
             "🎯 Спасибо за прохождение теста!\n\nНачни Vision Phase — это бесплатно 👇",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("✨ Начать Vision Phase", url=MYCELIUM_APP_URL)
-            ]])
+            reply_markup=VISION_PHASE_KEYBOARD
         )
         return
 
@@ -82,10 +83,10 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     # Prepare message
     if score >= 80:
-        text = RESULT_HIGH_SCORE.format(name=user.first_name or "друг", score=score)
+        text = HIGH_SCORE.render(name=user.first_name or "друг", score=score)
         video_key = "phoenix_success"
     else:
-        text = RESULT_WITH_BLOCKER.format(
+        text = WITH_BLOCKER.render(
             name=user.first_name or "друг",
             score=score,
             blocker=blocker,
@@ -93,51 +94,33 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         video_key = f"{char_key}_blocker"
 
-    keyboard = InlineKeyboardMarkup([[
-        InlineKeyboardButton("🖥 Открыть на десктопе", url=MYCELIUM_APP_URL)
-    ]])
+    keyboard = DESKTOP_KEYBOARD
 
     # FIRST: Send video/message (before DB operations!)
-    video_id = VIDEOS.get(video_key)
-    logger.info(f"Looking for video: key={video_key}, video_id={video_id[:30] if video_id else None}...")
-
-    if video_id:
-        try:
-            await update.message.reply_video(
-                video=video_id,
-                caption=text,
-                reply_markup=keyboard
-            )
+    # Stale file_ids are skipped or fall back to text inside the helper
+    try:
+        sent = await send_video_or_text(context.bot, update.effective_chat.id, video_key, text, reply_markup=keyboard)
+        if sent.video:
             logger.info(f"Video sent successfully: {video_key}")
-        except Exception as video_err:
-            logger.error(f"Failed to send video {video_key}: {video_err}")
-            await update.message.reply_text(text=text, reply_markup=keyboard)
-    else:
-        logger.warning(f"No video found for key: {video_key}")
-        await update.message.reply_text(text=text, reply_markup=keyboard)
+        else:
+            logger.warning(f"No valid video for key: {video_key}, sent text")
+    except Exception as send_err:
+        logger.error(f"Failed to send quiz result to {user.id}: {send_err}")
 
     # THEN: Database operations (separate try block)
     try:
-        db = get_session()
-        db_user = db.query(User).filter(User.telegram_id == user.id).first()
-        if not db_user:
-            db_user = User(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name
-            )
-            db.add(db_user)
-
-        db_user.quiz_completed = True
-        db_user.quiz_score = score
-        db_user.blocker = blocker
-        db.commit()
-        db.close()
+        await save_quiz_result(
+            user.id,
+            score=score,
+            blocker=blocker,
+            username=user.username,
+            first_name=user.first_name
+        )
         logger.info(f"User {user.id} saved to DB: score={score}, blocker={blocker}")
 
         # Cancel sequence A and schedule B
-        cancel_jobs(context, user.id, "seq_a")
-        schedule_sequence_b(context, user.id, score)
+        await cancel_jobs(context, user.id, "seq_a")
+        await schedule_sequence_b(context, user.id, score)
 
     except Exception as db_err:
         logger.error(f"DB error (video already sent): {db_err}")
@@ -146,7 +129,7 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         supabase = get_supabase_client()
         if supabase.is_enabled:
-            await supabase.sync_user_status(
+            await supabase.queue_user_status(
                 telegram_id=user.id,
                 username=user.username,
                 first_name=user.first_name,
@@ -155,7 +138,7 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
                 quiz_score=score,
                 onboarding_step="quiz_complete"
             )
-            logger.info(f"User {user.id} synced to Supabase: blocker={blocker}, char={char_key}")
+            logger.info(f"User {user.id} queued for Supabase sync: blocker={blocker}, char={char_key}")
 
     except Exception as sync_err:
         logger.error(f"Supabase sync error: {sync_err}")
@@ -167,11 +150,7 @@ async def quiz_result_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
 Если есть проект или экспертиза — вступай в клуб билдеров.
 Делимся опытом, разбираем кейсы, помогаем расти."""
 
-        community_keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🚀 Вступить в клуб", url="https://t.me/mDAOsists")]
-        ])
-
-        await update.message.reply_text(text=community_msg, reply_markup=community_keyboard)
+        await update.message.reply_text(text=community_msg, reply_markup=COMMUNITY_KEYBOARD)
 
     except Exception as e:
         logger.error(f"Community invite error: {e}")
@@ -1,16 +1,21 @@
+import asyncio
 import logging
-from datetime import timedelta
-from telegram import WebAppInfo, KeyboardButton, ReplyKeyboardMarkup, InlineKeyboardButton, InlineKeyboardMarkup
+from datetime import datetime, timedelta
 from telegram.ext import ContextTypes
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
 
-from config import CALCULATOR_URL, MYCELIUM_APP_URL
+from config import SEQUENCE_BATCH_SIZE
 from content.messages import (
     SEQ_A_4H, SEQ_A_DAY2, SEQ_A_DAY4, SEQ_A_DAY7,
     SEQ_B_DAY1, SEQ_B_DAY2, SEQ_B_DAY3, SEQ_B_DAY4,
     SEQ_B_DAY5, SEQ_B_DAY6, SEQ_B_DAY7,
 )
-from content.videos import VIDEOS
-from database import get_session, User
+from content.render import render, LAUNCHPAD_KEYBOARD, VISION_PHASE_KEYBOARD
+from database import get_async_session, User, ScheduledMessage
+from services.media import send_video_or_text
+from services.metrics import timed
+from services.outbound import PRIORITY_DRIP
 
 logger = logging.getLogger(__name__)
 
@@ -34,138 +39,207 @@ SEQUENCE_B = {
 }
 
 
-def cancel_jobs(context: ContextTypes.DEFAULT_TYPE, user_id: int, prefix: str):
-    """Cancel all scheduled jobs with given prefix for user"""
-    jobs = context.job_queue.jobs()
-    cancelled = 0
-    for job in jobs:
-        if job.name and job.name.startswith(f"{prefix}_{user_id}"):
-            job.schedule_removal()
-            cancelled += 1
-    if cancelled > 0:
-        logger.info(f"Cancelled {cancelled} {prefix} jobs for user {user_id}")
-
-
-def schedule_sequence_a(context: ContextTypes.DEFAULT_TYPE, user_id: int):
-    """Schedule sequence A messages for a user"""
-    for day, content in SEQUENCE_A.items():
-        if day < 1:
-            delay = timedelta(hours=int(day * 24))
-        else:
-            delay = timedelta(days=day)
-
-        context.job_queue.run_once(
-            send_sequence_a_message,
-            when=delay,
-            data={"user_id": user_id, "day": day},
-            name=f"seq_a_{user_id}_{day}"
-        )
-    logger.info(f"Scheduled sequence A for user {user_id}")
+def _step(sequence: dict, day: float) -> int:
+    """1-based position of `day` in a sequence, as stored in sequence_a_day / sequence_b_day"""
+    return list(sequence).index(day) + 1
 
 
-def schedule_sequence_b(context: ContextTypes.DEFAULT_TYPE, user_id: int, score: int):
-    """Schedule sequence B messages for a user"""
-    for day, content in SEQUENCE_B.items():
-        context.job_queue.run_once(
-            send_sequence_b_message,
-            when=timedelta(days=day),
-            data={"user_id": user_id, "day": day, "score": score},
-            name=f"seq_b_{user_id}_{day}"
-        )
-    logger.info(f"Scheduled sequence B for user {user_id}")
+def _sequence_a_delay(day: float) -> timedelta:
+    """Delay from /start until a sequence A message is due"""
+    if day < 1:
+        return timedelta(hours=int(day * 24))
+    return timedelta(days=day)
 
 
-async def send_sequence_a_message(context: ContextTypes.DEFAULT_TYPE):
-    """Send scheduled message for sequence A (didn't complete quiz)"""
-    job = context.job
-    user_id = job.data["user_id"]
-    day = job.data["day"]
+@timed("db_latency_seconds")
+async def cancel_jobs(context: ContextTypes.DEFAULT_TYPE, user_id: int, prefix: str):
+    """Cancel all pending sequence messages with given prefix for user"""
+    async with get_async_session() as db:
+        result = await db.execute(delete(ScheduledMessage).where(
+            ScheduledMessage.telegram_id == user_id,
+            ScheduledMessage.sequence == prefix
+        ))
+        await db.commit()
+    if result.rowcount > 0:
+        logger.info(f"Cancelled {result.rowcount} {prefix} messages for user {user_id}")
 
-    db = get_session()
-    try:
-        # Check if user completed quiz
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        if db_user and db_user.quiz_completed:
-            logger.info(f"Skipping sequence A day {day} for user {user_id} - quiz completed")
-            return
 
-        content = SEQUENCE_A.get(day)
-        if not content:
-            return
+async def _has_pending(db, user_id: int, prefix: str) -> bool:
+    """Check (via the user/sequence index) whether the user already has pending messages"""
+    pending = await db.scalar(select(ScheduledMessage.id).where(
+        ScheduledMessage.telegram_id == user_id,
+        ScheduledMessage.sequence == prefix
+    ).limit(1))
+    return pending is not None
 
-        keyboard = ReplyKeyboardMarkup([[
-            KeyboardButton(
-                "🚀 Пройти Idea Launchpad",
-                web_app=WebAppInfo(url=CALCULATOR_URL)
-            )
-        ]], resize_keyboard=True)
 
+@timed("db_latency_seconds")
+async def schedule_sequence_a(context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    """Schedule sequence A messages for a user (no-op if already scheduled, sent or past the quiz)"""
+    now = datetime.utcnow()
+    async with get_async_session() as db:
         try:
-            video_id = VIDEOS.get(content["video"])
-            if video_id:
-                await context.bot.send_video(
-                    chat_id=user_id,
-                    video=video_id,
-                    caption=content["text"],
-                    reply_markup=keyboard
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=content["text"],
-                    reply_markup=keyboard
-                )
-            logger.info(f"Sent sequence A day {day} to user {user_id}")
-        except Exception as e:
-            logger.error(f"Failed to send sequence A message to {user_id}: {e}")
-    finally:
-        db.close()
-
-
-async def send_sequence_b_message(context: ContextTypes.DEFAULT_TYPE):
-    """Send scheduled message for sequence B (didn't start Vision)"""
-    job = context.job
-    user_id = job.data["user_id"]
-    day = job.data["day"]
-    score = job.data.get("score", 0)
-
-    db = get_session()
-    try:
-        # Check if user started Vision
-        db_user = db.query(User).filter(User.telegram_id == user_id).first()
-        if db_user and db_user.vision_started:
-            logger.info(f"Skipping sequence B day {day} for user {user_id} - Vision started")
+            if await _has_pending(db, user_id, "seq_a"):
+                logger.debug(f"Sequence A already scheduled for user {user_id}")
+                return
+
+            # Sent rows are deleted: the user row tells a finished sequence from a new user
+            progress = (await db.execute(select(User.sequence_a_day, User.quiz_completed).where(
+                User.telegram_id == user_id
+            ))).first()
+            if progress and (progress.sequence_a_day or progress.quiz_completed):
+                logger.debug(f"Sequence A already sent or quiz completed for user {user_id}")
+                return
+
+            for day in SEQUENCE_A:
+                db.add(ScheduledMessage(
+                    telegram_id=user_id,
+                    sequence="seq_a",
+                    day=day,
+                    due_at=now + _sequence_a_delay(day)
+                ))
+            await db.commit()
+            logger.info(f"Scheduled sequence A for user {user_id}")
+        except IntegrityError:
+            # Concurrent /start already inserted the same rows
+            await db.rollback()
+
+
+@timed("db_latency_seconds")
+async def schedule_sequence_b(context: ContextTypes.DEFAULT_TYPE, user_id: int, score: int):
+    """Schedule sequence B messages for a user (updates the score if already scheduled)"""
+    now = datetime.utcnow()
+    async with get_async_session() as db:
+        try:
+            result = await db.execute(update(ScheduledMessage).where(
+                ScheduledMessage.telegram_id == user_id,
+                ScheduledMessage.sequence == "seq_b"
+            ).values(score=score))
+
+            if result.rowcount:
+                await db.commit()
+                logger.debug(f"Sequence B already scheduled for user {user_id}, score updated")
+                return
+
+            for day in SEQUENCE_B:
+                db.add(ScheduledMessage(
+                    telegram_id=user_id,
+                    sequence="seq_b",
+                    day=day,
+                    score=score,
+                    due_at=now + timedelta(days=day)
+                ))
+            await db.commit()
+            logger.info(f"Scheduled sequence B for user {user_id}")
+        except IntegrityError:
+            await db.rollback()
+
+
+async def process_due_sequences(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Send all sequence messages that are due, one batch at a time.
+
+    Runs as a single repeating job. Pending messages live in the
+    scheduled_messages table, so memory stays flat regardless of the
+    number of users and a restart resumes where the last run stopped.
+    """
+    while True:
+        async with get_async_session() as db:
+            due = (await db.scalars(
+                select(ScheduledMessage)
+                .where(ScheduledMessage.due_at <= datetime.utcnow())
+                .order_by(ScheduledMessage.due_at)
+                .limit(SEQUENCE_BATCH_SIZE)
+            )).all()
+
+            if not due:
+                return
+
+            # One query for the whole batch instead of one per message
+            telegram_ids = {row.telegram_id for row in due}
+            users = {
+                u.telegram_id: u
+                for u in await db.scalars(select(User).where(User.telegram_id.in_(telegram_ids)))
+            }
+
+            sends = []
+            for row in due:
+                db_user = users.get(row.telegram_id)
+
+                if row.sequence == "seq_a":
+                    if db_user and db_user.quiz_completed:
+                        logger.info(f"Skipping sequence A day {row.day:g} for user {row.telegram_id} - quiz completed")
+                    else:
+                        sends.append((row, db_user, send_sequence_a_message(context, row.telegram_id, row.day)))
+                elif row.sequence == "seq_b":
+                    if db_user and db_user.vision_started:
+                        logger.info(f"Skipping sequence B day {row.day:g} for user {row.telegram_id} - Vision started")
+                    else:
+                        sends.append((row, db_user, send_sequence_b_message(context, row.telegram_id, row.day, row.score or 0)))
+
+            # Send the batch concurrently; the outbound rate limiter paces it
+            results = await asyncio.gather(*(send for _, _, send in sends))
+            for (row, db_user, _), sent in zip(sends, results):
+                if sent and db_user:
+                    if row.sequence == "seq_a":
+                        db_user.sequence_a_day = max(db_user.sequence_a_day or 0, _step(SEQUENCE_A, row.day))
+                    else:
+                        db_user.sequence_b_day = max(db_user.sequence_b_day or 0, _step(SEQUENCE_B, row.day))
+
+            for row in due:
+                await db.delete(row)
+
+            await db.commit()
+
+        if len(due) < SEQUENCE_BATCH_SIZE:
             return
 
-        content = SEQUENCE_B.get(day)
-        if not content:
-            return
 
-        text = content["text"]
-        if "{score}" in text:
-            text = text.format(score=score)
+async def send_sequence_a_message(context: ContextTypes.DEFAULT_TYPE, user_id: int, day: float) -> bool:
+    """Send sequence A message (didn't complete quiz). Returns True if sent"""
+    content = SEQUENCE_A.get(day)
+    if not content:
+        return False
 
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("✨ Начать Vision Phase", url=MYCELIUM_APP_URL)
-        ]])
+    text = render(content["text"])
+    keyboard = LAUNCHPAD_KEYBOARD
 
-        try:
-            video_id = VIDEOS.get(content["video"])
-            if video_id:
-                await context.bot.send_video(
-                    chat_id=user_id,
-                    video=video_id,
-                    caption=text,
-                    reply_markup=keyboard
-                )
-            else:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=text,
-                    reply_markup=keyboard
-                )
-            logger.info(f"Sent sequence B day {day} to user {user_id}")
-        except Exception as e:
-            logger.error(f"Failed to send sequence B message to {user_id}: {e}")
-    finally:
-        db.close()
+    try:
+        await send_video_or_text(
+            context.bot,
+            user_id,
+            content["video"],
+            text,
+            reply_markup=keyboard,
+            rate_limit_args=PRIORITY_DRIP
+        )
+        logger.info(f"Sent sequence A day {day:g} to user {user_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send sequence A message to {user_id}: {e}")
+        return False
+
+
+async def send_sequence_b_message(context: ContextTypes.DEFAULT_TYPE, user_id: int, day: float, score: int = 0) -> bool:
+    """Send sequence B message (didn't start Vision). Returns True if sent"""
+    content = SEQUENCE_B.get(day)
+    if not content:
+        return False
+
+    text = render(content["text"], score=score)
+    keyboard = VISION_PHASE_KEYBOARD
+
+    try:
+        await send_video_or_text(
+            context.bot,
+            user_id,
+            content["video"],
+            text,
+            reply_markup=keyboard,
+            rate_limit_args=PRIORITY_DRIP
+        )
+        logger.info(f"Sent sequence B day {day:g} to user {user_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send sequence B message to {user_id}: {e}")
+        return False
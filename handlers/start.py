@@ -1,62 +1,32 @@
 import logging
-from datetime import datetime
-from telegram import Update, WebAppInfo, KeyboardButton, ReplyKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from config import CALCULATOR_URL
 from content.messages import WELCOME_MESSAGE
-from content.videos import VIDEOS
-from database import get_session, User
+from content.render import template, LAUNCHPAD_KEYBOARD
+from database import touch_user
+from services.media import send_video_or_text
 from .sequences import schedule_sequence_a
 
 logger = logging.getLogger(__name__)
 
+WELCOME = template(WELCOME_MESSAGE)
+
 
 async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Welcome message with calculator button"""
     user = update.effective_user
-    db = get_session()
-
-    try:
-        # Get or create user in DB
-        db_user = db.query(User).filter(User.telegram_id == user.id).first()
-        if not db_user:
-            db_user = User(
-                telegram_id=user.id,
-                username=user.username,
-                first_name=user.first_name
-            )
-            db.add(db_user)
-            db.commit()
-            logger.info(f"New user created: {user.id} ({user.first_name})")
-
-        # Update last active
-        db_user.last_active = datetime.utcnow()
-        db.commit()
-
-        # Send welcome
-        text = WELCOME_MESSAGE.format(name=user.first_name or "друг")
-        keyboard = ReplyKeyboardMarkup([[
-            KeyboardButton(
-                "🚀 Пройти Idea Launchpad",
-                web_app=WebAppInfo(url=CALCULATOR_URL)
-            )
-        ]], resize_keyboard=True)
-
-        video_id = VIDEOS.get("ever_welcome")
-        if video_id:
-            await update.message.reply_video(
-                video=video_id,
-                caption=text,
-                reply_markup=keyboard
-            )
-        else:
-            await update.message.reply_text(text=text, reply_markup=keyboard)
-
-        # Schedule sequence A (if they don't complete quiz)
-        schedule_sequence_a(context, user.id)
-
-        logger.info(f"Start handler completed for user {user.id}")
-
-    finally:
-        db.close()
+
+    # Create the user in DB if needed (also updates last active)
+    await touch_user(user.id, user.username, user.first_name)
+
+    # Send welcome
+    text = WELCOME.render(name=user.first_name or "друг")
+    keyboard = LAUNCHPAD_KEYBOARD
+
+    await send_video_or_text(context.bot, update.effective_chat.id, "ever_welcome", text, reply_markup=keyboard)
+
+    # Schedule sequence A (if they don't complete quiz)
+    await schedule_sequence_a(context, user.id)
+
+    logger.info(f"Start handler completed for user {user.id}")
@@ -8,12 +8,12 @@ Displays user's project progress from Supabase:
 """
 
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update
 from telegram.ext import ContextTypes
 
-from config import TMA_VISION_URL, DESKTOP_APP_URL
+from content.render import status_cta_keyboard, START_VISION_CARD_KEYBOARD, QUIZ_KEYBOARD
 from database.supabase_client import get_supabase_client
-from database import get_session, User
+from database import get_user
 
 logger = logging.getLogger(__name__)
 
@@ -78,19 +78,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 📍 Текущая фаза: {current_phase.upper()}"""
 
             # Suggest next action based on progress
-            if vision == 0:
-                cta_text = "🃏 Начать Vision Card"
-                cta_url = TMA_VISION_URL
-            elif vision < 100:
-                cta_text = "🃏 Продолжить Vision Card"
-                cta_url = TMA_VISION_URL
-            else:
-                cta_text = "💻 Перейти к Build Phase"
-                cta_url = DESKTOP_APP_URL
-
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton(cta_text, url=cta_url)]
-            ])
+            keyboard = status_cta_keyboard(vision)
 
             await update.message.reply_text(
                 text=text,
@@ -101,9 +89,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Fallback: Get status from local SQLite
     try:
-        db = get_session()
-        db_user = db.query(User).filter(User.telegram_id == user.id).first()
-        db.close()
+        db_user = await get_user(user.id)
 
         if db_user and db_user.quiz_completed:
             blocker = db_user.blocker or "Не определён"
@@ -118,9 +104,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 Пройди Vision Phase чтобы разблокировать отслеживание."""
 
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🃏 Start Vision Card", url=TMA_VISION_URL)]
-            ])
+            keyboard = START_VISION_CARD_KEYBOARD
         else:
             text = """📊 **Твой статус**
 
@@ -128,10 +112,7 @@ async def status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 Пройди квиз чтобы узнать свой блокер и получить персонального проводника."""
 
-            from config import CALCULATOR_URL
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🧮 Пройти квиз", url=CALCULATOR_URL)]
-            ])
+            keyboard = QUIZ_KEYBOARD
 
         await update.message.reply_text(
             text=text,
@@ -1,11 +1,22 @@
 import logging
-from telegram import Update
+from telegram import Update, InputMediaDocument
 from telegram.ext import ContextTypes
 
-from content.videos import VIDEOS
+from content.videos import video_registry
+from services.media import send_media_batches
 
 logger = logging.getLogger(__name__)
 
+# Только нужные для сайта (результат квиза): filename -> VIDEOS key
+DOWNLOAD_VIDEOS = {
+    "phoenix_success.mp4": "phoenix_success",
+    "ever_blocker.mp4": "ever_blocker",
+    "prisma_blocker.mp4": "prisma_blocker",
+    "zen_blocker.mp4": "zen_blocker",
+    "toxic_blocker.mp4": "toxic_blocker",
+    "tech_priest_blocker.mp4": "tech_priest_blocker",
+}
+
 
 async def video_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle video uploads - returns file_id for adding to videos.py"""
@@ -27,31 +38,21 @@ Copy this file_id and add it to `content/videos.py`"""
 
 async def download_all_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send all videos for download with proper filenames"""
-
-    # Только нужные для сайта (результат квиза)
-    videos_to_send = {
-        "phoenix_success.mp4": VIDEOS.get("phoenix_success"),
-        "ever_blocker.mp4": VIDEOS.get("ever_blocker"),
-        "prisma_blocker.mp4": VIDEOS.get("prisma_blocker"),
-        "zen_blocker.mp4": VIDEOS.get("zen_blocker"),
-        "toxic_blocker.mp4": VIDEOS.get("toxic_blocker"),
-        "tech_priest_blocker.mp4": VIDEOS.get("tech_priest_blocker"),
-    }
+    media = [
+        (filename, InputMediaDocument(file_id, caption=f"📁 {filename}"))
+        for filename, key in DOWNLOAD_VIDEOS.items()
+        if (file_id := video_registry.get(key))
+    ]
 
     await update.message.reply_text("📥 Отправляю видео для скачивания...")
 
-    sent = 0
-    for filename, file_id in videos_to_send.items():
-        if file_id:
-            try:
-                await update.message.reply_document(
-                    document=file_id,
-                    filename=filename,
-                    caption=f"📁 {filename}"
-                )
-                sent += 1
-            except Exception as e:
-                logger.error(f"Failed to send {filename}: {e}")
-                await update.message.reply_text(f"❌ Ошибка: {filename}")
-
-    await update.message.reply_text(f"✅ Отправлено {sent}/6 видео. Скачай и загрузи в Lovable!")
+    sent, errors = await send_media_batches(context.bot, update.effective_chat.id, media)
+
+    if errors:
+        for filename, error in errors.items():
+            logger.error(f"Failed to send {filename}: {error}")
+        await update.message.reply_text(
+            "❌ Ошибка:\n" + "\n".join(f"• {filename}" for filename in errors)
+        )
+
+    await update.message.reply_text(f"✅ Отправлено {sent}/{len(DOWNLOAD_VIDEOS)} видео. Скачай и загрузи в Lovable!")
@@ -6,7 +6,6 @@
 import logging
 import random
 import asyncio
-import os
 from datetime import time
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
@@ -19,10 +18,15 @@ except ImportError:
 
 from config import (
     KUZYA_BOT_TOKEN, BOT_NAME, BOT_NAMES,
-    TIMEZONE, CHECKIN_MESSAGES, CHECKIN_TIMES
+    TIMEZONE, CHECKIN_MESSAGES, CHECKIN_TIMES,
+    METRICS_HOST, METRICS_PORT
 )
 from gemini_client import get_kuzya_client
 from database import register_chat, get_all_active_chats, remove_chat, log_message
+from metrics import InstrumentedRequest, instrument_handlers, start_metrics_server
+from outbound import OutboundRateLimiter, PRIORITY_BROADCAST
+from transcription import transcribe_voice, close_http_session
+from triggers import TriggerMatcher
 
 # Configure logging
 logging.basicConfig(
@@ -31,6 +35,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Names Kuzya answers to, compiled once
+TRIGGERS = TriggerMatcher(name=BOT_NAMES)
+
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle text messages"""
@@ -57,7 +64,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message.reply_to_message.from_user and
         message.reply_to_message.from_user.id == context.bot.id
     )
-    is_called = any(name in text_lower for name in BOT_NAMES)
+    is_called = "name" in TRIGGERS.match(text)
     bot_username = context.bot.username
     is_mention = f"@{bot_username}".lower() in text_lower if bot_username else False
 
@@ -130,59 +137,7 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await message.reply_text("Минутку, расшифровываю голосовое...")
 
     try:
-        # Download voice
-        voice = message.voice
-        file = await context.bot.get_file(voice.file_id)
-        voice_path = f"/tmp/kuzya_voice_{voice.file_id}.ogg"
-        await file.download_to_drive(voice_path)
-
-        text = None
-
-        # Try OpenAI Whisper
-        openai_key = os.environ.get("OPENAI_API_KEY")
-        if openai_key:
-            try:
-                import requests
-                with open(voice_path, "rb") as audio:
-                    response = requests.post(
-                        "https://api.openai.com/v1/audio/transcriptions",
-                        headers={"Authorization": f"Bearer {openai_key}"},
-                        files={"file": audio},
-                        data={"model": "whisper-1", "language": "ru"},
-                        timeout=60
-                    )
-                if response.ok:
-                    text = response.json().get("text", "").strip()
-            except Exception as e:
-                logger.warning(f"Whisper error: {e}")
-
-        # Fallback to Google Speech
-        if not text:
-            try:
-                import subprocess
-                import speech_recognition as sr
-
-                wav_path = f"/tmp/kuzya_voice_{voice.file_id}.wav"
-                subprocess.run(
-                    ["ffmpeg", "-y", "-i", voice_path, "-ar", "16000", "-ac", "1", wav_path],
-                    capture_output=True, timeout=30
-                )
-
-                recognizer = sr.Recognizer()
-                with sr.AudioFile(wav_path) as source:
-                    audio = recognizer.record(source)
-                text = recognizer.recognize_google(audio, language="ru-RU")
-
-                if os.path.exists(wav_path):
-                    os.unlink(wav_path)
-
-            except Exception as e:
-                logger.warning(f"Google Speech error: {e}")
-
-        # Cleanup
-        if os.path.exists(voice_path):
-            os.unlink(voice_path)
-
+        text, _ = await transcribe_voice(message.voice)
         if not text:
             await message.reply_text("Простите, не смог расшифровать. Попробуйте записать ещё раз?")
             return
@@ -222,13 +177,12 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     caption = message.caption or ""
 
     # Check if should respond to photo
-    caption_lower = caption.lower()
     is_reply_to_bot = (
         message.reply_to_message and
         message.reply_to_message.from_user and
         message.reply_to_message.from_user.id == context.bot.id
     )
-    is_called = any(name in caption_lower for name in BOT_NAMES)
+    is_called = "name" in TRIGGERS.match(caption)
 
     # In private - always, in group - need to be called
     if message.chat.type != "private" and not (is_reply_to_bot or is_called):
@@ -301,7 +255,7 @@ async def daily_checkin(context: ContextTypes.DEFAULT_TYPE):
             if not message:
                 message = random.choice(CHECKIN_MESSAGES)
 
-            await context.bot.send_message(chat_id=chat_id, text=message)
+            await context.bot.send_message(chat_id=chat_id, text=message, rate_limit_args=PRIORITY_BROADCAST)
             log_message(chat_id, BOT_NAME, "assistant", message)
             logger.info(f"Sent check-in to {chat_id}: {message[:30]}...")
         except Exception as e:
@@ -311,6 +265,19 @@ async def daily_checkin(context: ContextTypes.DEFAULT_TYPE):
                 remove_chat(chat_id)
 
 
+async def on_startup(app: Application):
+    """Start the /metrics endpoint"""
+    app.bot_data["metrics_server"] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+
+async def on_shutdown(app: Application):
+    """Close the transcription HTTP session, stop the /metrics endpoint"""
+    await close_http_session()
+    metrics_server = app.bot_data.get("metrics_server")
+    if metrics_server:
+        await metrics_server.cleanup()
+
+
 def main():
     """Start Kuzya bot"""
     if not KUZYA_BOT_TOKEN:
@@ -318,7 +285,15 @@ def main():
 
     logger.info(f"Starting {BOT_NAME} bot...")
 
-    app = Application.builder().token(KUZYA_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(KUZYA_BOT_TOKEN)
+        .request(InstrumentedRequest())
+        .rate_limiter(OutboundRateLimiter())
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Commands
     app.add_handler(CommandHandler("start", start_command))
@@ -328,6 +303,7 @@ def main():
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     app.add_handler(MessageHandler(filters.PHOTO, handle_photo))
     app.add_handler(MessageHandler(filters.VOICE, handle_voice))
+    instrument_handlers(app)
 
     # Schedule daily check-ins to all active chats
     if PYTZ_AVAILABLE:
@@ -9,6 +9,21 @@ KUZYA_BOT_TOKEN = os.getenv("KUZYA_BOT_TOKEN")
 # Gemini API
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Gemini calls: give up after LLM_TIMEOUT_SECONDS; sync-only calls (images) share LLM_MAX_WORKERS threads
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+
+# Prometheus-style metrics: GET /metrics on its own port (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9093"))
+
+# Voice transcripts cached by Telegram file_unique_id (least recently used dropped past the limit)
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+# A cache hit refreshes last_used_at at most this often (LRU precision vs. a write per hit)
+TRANSCRIPT_TOUCH_SECONDS = int(os.getenv("TRANSCRIPT_TOUCH_SECONDS", "3600"))
+# Trim the cache to TRANSCRIPT_CACHE_MAX_ENTRIES on the first save and then every N saves
+TRANSCRIPT_PRUNE_EVERY = int(os.getenv("TRANSCRIPT_PRUNE_EVERY", "100"))
+
 # Timezone
 TIMEZONE = "Europe/Moscow"
 
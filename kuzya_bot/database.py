@@ -3,10 +3,15 @@ Simple SQLite database for storing active chats
 Auto-remembers chats where Kuzya has talked
 """
 
+import itertools
 import sqlite3
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Optional, Tuple
+
+from config import TRANSCRIPT_CACHE_MAX_ENTRIES, TRANSCRIPT_TOUCH_SECONDS, TRANSCRIPT_PRUNE_EVERY
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +54,19 @@ def init_db():
 
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_logs_chat_id ON chat_logs(chat_id)")
 
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS voice_transcripts (
+                file_unique_id TEXT,
+                backend TEXT,
+                content TEXT,
+                created_at TEXT,
+                last_used_at TEXT,
+                PRIMARY KEY (file_unique_id, backend)
+            )
+        """)
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_voice_transcripts_last_used ON voice_transcripts(last_used_at)")
+
         conn.commit()
         conn.close()
         logger.info("Database initialized")
@@ -56,6 +74,7 @@ def init_db():
         logger.error(f"Error initializing database: {e}")
 
 
+@timed("db_latency_seconds")
 def register_chat(chat_id: int, chat_title: str = None):
     """Register a chat (or update last message time)"""
     try:
@@ -85,6 +104,7 @@ def register_chat(chat_id: int, chat_title: str = None):
         logger.error(f"Error registering chat: {e}")
 
 
+@timed("db_latency_seconds")
 def get_all_active_chats() -> list:
     """Get all registered chat IDs"""
     try:
@@ -101,6 +121,7 @@ def get_all_active_chats() -> list:
         return []
 
 
+@timed("db_latency_seconds")
 def remove_chat(chat_id: int):
     """Remove a chat (e.g., if bot was kicked)"""
     try:
@@ -116,6 +137,7 @@ def remove_chat(chat_id: int):
         logger.error(f"Error removing chat: {e}")
 
 
+@timed("db_latency_seconds")
 def log_message(chat_id: int, user_name: str, role: str, content: str):
     """Log a message to the database"""
     try:
@@ -134,6 +156,7 @@ def log_message(chat_id: int, user_name: str, role: str, content: str):
         logger.error(f"Error logging message: {e}")
 
 
+@timed("db_latency_seconds")
 def get_recent_messages(chat_id: int, limit: int = 20) -> list:
     """Get recent messages from a chat for context"""
     try:
@@ -154,5 +177,71 @@ def get_recent_messages(chat_id: int, limit: int = 20) -> list:
         return []
 
 
+@timed("db_latency_seconds")
+def get_transcript(file_unique_id: str, backends: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """Cached (backend, text) for a voice file, first backend in `backends` order; None if not cached"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT backend, content, last_used_at FROM voice_transcripts WHERE file_unique_id = ?",
+            (file_unique_id,)
+        )
+        rows = {row["backend"]: row for row in cursor.fetchall()}
+        backend = next((backend for backend in backends if backend in rows), None)
+
+        if backend:
+            now = datetime.utcnow()
+            last_used_at = rows[backend]["last_used_at"]
+            if not last_used_at or (now - datetime.fromisoformat(last_used_at)).total_seconds() >= TRANSCRIPT_TOUCH_SECONDS:
+                cursor.execute(
+                    "UPDATE voice_transcripts SET last_used_at = ? WHERE file_unique_id = ? AND backend = ?",
+                    (now.isoformat(), file_unique_id, backend)
+                )
+                conn.commit()
+        conn.close()
+
+        return (backend, rows[backend]["content"]) if backend else None
+    except Exception as e:
+        logger.error(f"Error reading transcript cache: {e}")
+        return None
+
+
+# Saves since startup (so the first save after a restart prunes too)
+_transcript_saves = itertools.count()
+
+
+@timed("db_latency_seconds")
+def save_transcript(file_unique_id: str, backend: str, content: str):
+    """
+    Cache a transcript
+
+    Every TRANSCRIPT_PRUNE_EVERY saves the least recently used beyond
+    TRANSCRIPT_CACHE_MAX_ENTRIES are dropped (the OFFSET delete walks the index).
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        now = datetime.utcnow().isoformat()
+
+        cursor.execute(
+            "INSERT OR REPLACE INTO voice_transcripts (file_unique_id, backend, content, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+            (file_unique_id, backend, content, now, now)
+        )
+        if next(_transcript_saves) % TRANSCRIPT_PRUNE_EVERY == 0:
+            cursor.execute(
+                """DELETE FROM voice_transcripts WHERE rowid IN (
+                    SELECT rowid FROM voice_transcripts ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (TRANSCRIPT_CACHE_MAX_ENTRIES,)
+            )
+
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error saving transcript: {e}")
+
+
 # Initialize on import
 init_db()
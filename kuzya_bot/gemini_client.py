@@ -2,10 +2,13 @@
 Gemini client for Kuzya bot - warm family assistant
 """
 
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
-from config import GEMINI_API_KEY, SYSTEM_PROMPT
+from config import GEMINI_API_KEY, SYSTEM_PROMPT, LLM_TIMEOUT_SECONDS, LLM_MAX_WORKERS
 from database import get_recent_messages
+from metrics import await_llm
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +16,9 @@ logger = logging.getLogger(__name__)
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
+# Sync-only Gemini calls run here so they never block the event loop
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="gemini")
+
 
 class KuzyaClient:
     """Gemini client with Kuzya personality"""
@@ -67,7 +73,7 @@ class KuzyaClient:
 
 {instruction}"""
 
-            response = self.model.generate_content(prompt)
+            response = await await_llm("generate_response", self.model.generate_content_async(prompt), LLM_TIMEOUT_SECONDS)
 
             return response.text.strip()
 
@@ -88,8 +94,13 @@ class KuzyaClient:
                 prompt += f" с подписью: {caption}"
             prompt += "\n\nОпиши что видишь и ответь на вопрос если есть."
 
-            # Use sync version - works better with images
-            response = self.model.generate_content([prompt, image])
+            # Use sync version - works better with images (off the event loop)
+            response = await await_llm(
+                "generate_response_with_image",
+                functools.partial(self.model.generate_content, [prompt, image]),
+                LLM_TIMEOUT_SECONDS,
+                _executor
+            )
 
             return response.text.strip()
 
@@ -123,7 +134,7 @@ class KuzyaClient:
 
 Напиши:"""
 
-            response = self.model.generate_content(prompt)
+            response = await await_llm("generate_proactive_message", self.model.generate_content_async(prompt), LLM_TIMEOUT_SECONDS)
             return response.text.strip()
 
         except Exception as e:
@@ -0,0 +1,276 @@
+"""
+Flood-controlled outbound sends for the Telegram Bot API
+
+OutboundRateLimiter plugs into python-telegram-bot as the Application's rate
+limiter, so every context.bot.send_* call goes through it:
+
+- token buckets: global (~30 msg/s), per private chat (~1 msg/s),
+  per group/channel (~20 msg/min)
+- priority classes: interactive replies are dispatched ahead of drip
+  (sequences, nudges) and broadcast (check-ins, daily posts) traffic
+- 429 RetryAfter pauses dispatch for retry_after and re-queues the request
+- stats(): queue depth, dispatch lag, sent / retried / failed counters
+
+Usage:
+    app = Application.builder().token(TOKEN).rate_limiter(OutboundRateLimiter()).build()
+    await context.bot.send_message(chat_id, text, rate_limit_args=PRIORITY_DRIP)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.constants import FloodLimit
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Priority classes (lower is dispatched first); pass as rate_limit_args
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DRIP = 1
+PRIORITY_BROADCAST = 2
+
+_PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_DRIP: "drip",
+    PRIORITY_BROADCAST: "broadcast",
+}
+
+# Endpoints that only count against the global bucket
+_GLOBAL_ONLY_ENDPOINTS = {"sendChatAction"}
+
+# Drop idle per-chat buckets once there are more than this many
+_MAX_IDLE_BUCKETS = 1024
+
+
+class TokenBucket:
+    """Token bucket handing out reservations (tokens may go negative)"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take a token, return how many seconds to wait before using it"""
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (without taking it)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float):
+        """Hold the bucket empty for `seconds` (after a 429)"""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboundRateLimiter(BaseRateLimiter[int]):
+    """
+    Priority-aware token bucket rate limiter for outgoing Bot API requests
+
+    `rate_limit_args` is the priority class of the request
+    (PRIORITY_INTERACTIVE by default).
+    """
+
+    def __init__(
+        self,
+        global_rate: float = FloodLimit.MESSAGES_PER_SECOND,
+        chat_rate: float = FloodLimit.MESSAGES_PER_SECOND_PER_CHAT,
+        chat_burst: float = 3,
+        group_rate: float = FloodLimit.MESSAGES_PER_MINUTE_PER_GROUP / 60,
+        group_burst: float = 5,
+        max_retries: int = 3,
+    ):
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._group_burst = group_burst
+        self.max_retries = max_retries
+
+        self._buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._queue: List[tuple] = []  # (priority, seq, future)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._paused_until = 0.0
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self._waiting = 0
+        self._sent = {name: 0 for name in _PRIORITY_NAMES.values()}
+        self._lag = {name: [0, 0.0, 0.0] for name in _PRIORITY_NAMES.values()}  # count, total, max
+        self._retried = 0
+        self._failed = 0
+
+    async def initialize(self) -> None:
+        self._ensure_dispatcher()
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def _dispatch(self):
+        """Hand out global tokens to queued requests, highest priority first"""
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._global.wait_time(now))
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():  # waiter was cancelled
+                continue
+            self._global.take()
+            future.set_result(None)
+
+    def _bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            if len(self._buckets) > _MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                for key in [k for k, b in self._buckets.items() if b.is_idle(now)]:
+                    del self._buckets[key]
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            if is_group:
+                bucket = TokenBucket(self._group_rate, self._group_burst)
+            else:
+                bucket = TokenBucket(self._chat_rate, self._chat_burst)
+            self._buckets[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, chat_id: Optional[Union[int, str]], priority: int):
+        enqueued = time.monotonic()
+        self._waiting += 1
+        try:
+            if chat_id is not None:
+                delay = self._bucket(chat_id).reserve(enqueued)
+                if delay:
+                    await asyncio.sleep(delay)
+
+            self._ensure_dispatcher()
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (priority, next(self._seq), future))
+            self._wakeup.set()
+            try:
+                await future
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+        finally:
+            self._waiting -= 1
+
+        lag = time.monotonic() - enqueued
+        stats = self._lag[_PRIORITY_NAMES[priority]]
+        stats[0] += 1
+        stats[1] += lag
+        stats[2] = max(stats[2], lag)
+
+    @staticmethod
+    def _chat_key(chat_id: Any) -> Optional[Union[int, str]]:
+        if chat_id is None:
+            return None
+        try:
+            return int(chat_id)
+        except (TypeError, ValueError):
+            return str(chat_id)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Any:
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            # Not a chat message (getMe, answerCallbackQuery, ...): only respect 429 pauses
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            return await callback(*args, **kwargs)
+
+        priority = rate_limit_args if rate_limit_args in _PRIORITY_NAMES else PRIORITY_INTERACTIVE
+        key = None if endpoint in _GLOBAL_ONLY_ENDPOINTS else self._chat_key(chat_id)
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(key, priority)
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                retry_after = float(retry_after) + 0.1
+
+                now = time.monotonic()
+                self._paused_until = max(self._paused_until, now + retry_after)
+                if key is not None:
+                    self._bucket(key).block(retry_after, now)
+
+                if attempt == self.max_retries:
+                    self._failed += 1
+                    logger.error(f"{endpoint} to {chat_id}: flood limit after {attempt} retries")
+                    raise
+                self._retried += 1
+                logger.warning(f"{endpoint} to {chat_id}: flood limit, retrying in {retry_after:.1f}s")
+                continue
+
+            self._sent[_PRIORITY_NAMES[priority]] += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, dispatch lag and send counters"""
+        return {
+            "queue_depth": self._waiting,
+            "paused_for": max(0.0, self._paused_until - time.monotonic()),
+            "buckets": len(self._buckets),
+            "sent": dict(self._sent),
+            "retried": self._retried,
+            "failed": self._failed,
+            "lag_ms": {
+                name: {
+                    "avg": total / count * 1000 if count else 0.0,
+                    "max": peak * 1000,
+                }
+                for name, (count, total, peak) in self._lag.items()
+            },
+        }
@@ -0,0 +1,182 @@
+"""
+Voice transcription
+
+Audio stays in memory end to end and nothing blocks the event loop:
+OpenAI Whisper gets it over one shared aiohttp session; the Google Speech
+fallback pipes it through ffmpeg (async subprocess, stdin -> raw PCM on
+stdout) and runs the synchronous recognizer in an executor.
+
+Transcripts are cached in the bot's DB (read and written in a thread) by
+Telegram file_unique_id and backend, so a forwarded or re-sent voice note is neither downloaded nor
+transcribed again (hit rate: transcript_cache_total on /metrics).
+"""
+
+import asyncio
+import logging
+import os
+from typing import Optional, Tuple
+
+import aiohttp
+from telegram import Voice
+
+from database import get_transcript, save_transcript
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+WHISPER_URL = "https://api.openai.com/v1/audio/transcriptions"
+WHISPER_TIMEOUT_SECONDS = 60
+FFMPEG_TIMEOUT_SECONDS = 30
+# ffmpeg output for speech_recognition: 16 kHz mono signed 16-bit PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+# Cache lookup order: a Whisper transcript is preferred when both exist
+BACKENDS = ("whisper", "google")
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Shared keep-alive HTTP session (created on first use, in the running loop)"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=WHISPER_TIMEOUT_SECONDS)
+        )
+    return _session
+
+
+async def close_http_session():
+    """Close the shared HTTP session (call once on shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def _whisper(audio: bytes, api_key: str) -> Tuple[Optional[str], Optional[str]]:
+    form = aiohttp.FormData()
+    form.add_field("file", audio, filename="voice.ogg", content_type="audio/ogg")
+    form.add_field("model", "whisper-1")
+    form.add_field("language", "ru")
+
+    try:
+        async with _get_session().post(
+            WHISPER_URL,
+            headers={"Authorization": f"Bearer {api_key}"},
+            data=form
+        ) as response:
+            if response.status != 200:
+                return None, f"OpenAI API: {response.status}"
+            data = await response.json()
+            return data.get("text", "").strip(), None
+    except Exception as e:
+        return None, f"OpenAI: {str(e)[:50] or type(e).__name__}"
+
+
+async def _to_pcm(audio: bytes) -> Optional[bytes]:
+    """Decode any ffmpeg-readable audio to raw PCM through pipes, None on failure"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-i", "pipe:0",
+            "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        logger.error(f"ffmpeg error: {e}")
+        return None
+
+    try:
+        pcm, stderr = await asyncio.wait_for(process.communicate(audio), timeout=FFMPEG_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.error("ffmpeg error: timed out")
+        return None
+
+    if process.returncode != 0:
+        logger.error(f"ffmpeg error: {stderr.decode(errors='replace')[-100:]}")
+        return None
+    return pcm
+
+
+def _recognize_google(pcm: bytes) -> str:
+    import speech_recognition as sr
+    audio = sr.AudioData(pcm, SAMPLE_RATE, SAMPLE_WIDTH)
+    return sr.Recognizer().recognize_google(audio, language="ru-RU")
+
+
+async def _google_speech(audio: bytes) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        import speech_recognition  # noqa: F401
+    except ImportError:
+        return None, "SpeechRecognition не установлен"
+
+    pcm = await _to_pcm(audio)
+    if pcm is None:
+        return None, "ffmpeg не работает"
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _recognize_google, pcm), None
+    except Exception as e:
+        return None, f"Speech: {str(e)[:50] or type(e).__name__}"
+
+
+async def transcribe(audio: bytes) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Transcribe a voice note (OGG/Opus bytes as Telegram sends them)
+
+    Tries OpenAI Whisper first when OPENAI_API_KEY is set, then Google Speech.
+
+    Returns:
+        (text, backend, None) on success, (None, None, short reason) otherwise
+    """
+    error = None
+
+    openai_key = os.environ.get("OPENAI_API_KEY")
+    if openai_key:
+        logger.info("Trying OpenAI Whisper API...")
+        text, error = await _whisper(audio, openai_key)
+        if text:
+            logger.info(f"OpenAI Whisper OK: {text[:50]}...")
+            return text, "whisper", None
+        if error:
+            logger.warning(error)
+
+    logger.info("Trying Google Speech...")
+    text, speech_error = await _google_speech(audio)
+    if text:
+        logger.info(f"Google Speech OK: {text[:50]}...")
+        return text, "google", None
+    if speech_error:
+        logger.error(speech_error)
+    return None, None, speech_error or error
+
+
+async def transcribe_voice(voice: Voice) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Transcribe a Telegram voice note, from the cache when it was seen before
+
+    Returns:
+        (text, None) on success, (None, short reason) otherwise
+    """
+    cached = await asyncio.to_thread(get_transcript, voice.file_unique_id, BACKENDS)
+    if cached:
+        metrics.inc("transcript_cache_total", result="hit")
+        backend, text = cached
+        logger.info(f"Transcript cache hit ({backend}): {text[:50]}...")
+        return text, None
+    metrics.inc("transcript_cache_total", result="miss")
+
+    # Download into memory
+    file = await voice.get_file()
+    audio = bytes(await file.download_as_bytearray())
+    logger.info(f"Voice downloaded: {len(audio)} bytes, duration: {voice.duration}s")
+
+    text, backend, error = await transcribe(audio)
+    if text:
+        await asyncio.to_thread(save_transcript, voice.file_unique_id, backend, text)
+    return text, error
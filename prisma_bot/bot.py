@@ -24,7 +24,11 @@ from config import (
     DAILY_CHECKINS,
     CHECKIN_PROMPTS,
     GOOGLE_DOCS_FOLDER_ID,
-    ADMIN_USERNAME
+    ADMIN_USERNAME,
+    METRICS_HOST,
+    METRICS_PORT,
+    ROUTING_REFRESH_SECONDS,
+    MEMORY_SHUTDOWN_SECONDS
 )
 from database import (
     init_db,
@@ -38,13 +42,20 @@ from database import (
     add_memory,
     delete_memory,
     is_chat_muted,
-    set_chat_muted
+    set_chat_muted,
+    take_memory_batches,
+    start_log_writer,
+    stop_log_writer
 )
 from gemini_client import get_prisma_client
 from google_docs_client import get_docs_client
 from github_client import get_github_client
 from youtube_client import get_youtube_client
+from metrics import InstrumentedRequest, instrument_handlers, start_metrics_server
+from transcription import transcribe_voice, close_http_session
+from triggers import TriggerMatcher
 from services.dialog_engine import get_dialog_engine
+from services.outbound import OutboundRateLimiter, PRIORITY_BROADCAST
 from supabase_client import get_supabase
 
 # Configure logging
@@ -54,6 +65,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Names and keywords Prisma reacts to, compiled once
+TRIGGERS = TriggerMatcher(name=BOT_NAMES, keyword=TRIGGER_KEYWORDS)
+
 
 # ==================== TOPIC DETECTION ====================
 
@@ -216,8 +230,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Message from {user_name}: {message.text[:50]}...")
 
     # Check if bot should respond
-    bot_username = (await context.bot.get_me()).username
-    text_lower = message.text.lower()
+    bot_username = context.bot.username  # cached by Application.initialize
+    triggers = TRIGGERS.match(message.text)
 
     is_reply_to_bot = (
         message.reply_to_message and
@@ -225,8 +239,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message.reply_to_message.from_user.id == context.bot.id
     )
     is_mention = f"@{bot_username}" in message.text if bot_username else False
-    is_called = any(name in text_lower for name in BOT_NAMES)
-    has_keyword = any(keyword in text_lower for keyword in TRIGGER_KEYWORDS)
+    is_called = "name" in triggers
+    has_keyword = "keyword" in triggers
 
     # Always respond to direct calls, mentions, replies
     # 30% chance to respond to keywords
@@ -274,96 +288,15 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     logger.info(f"Voice message from {user_name}, duration: {duration}s")
 
-    import os as os_module
-
-    # Warn if very long
+    # Limit duration (5 min max to avoid long processing)
     if duration > 300:
-        await message.reply_text("● длинное голосовое, расшифровываю... подожди минутку")
-    elif duration > 60:
+        await message.reply_text("○ аудио слишком длинное (макс 5 мин). разбей на части )")
+        return
+    if duration > 60:
         await message.reply_text("● расшифровываю голосовое...")
 
     try:
-        # Download voice file
-        voice = message.voice
-        file = await context.bot.get_file(voice.file_id)
-        voice_path = f"/tmp/voice_{voice.file_id}.ogg"
-        await file.download_to_drive(voice_path)
-        logger.info(f"Voice downloaded: {voice_path}, duration: {voice.duration}s")
-
-        # Limit duration (5 min max to avoid long processing)
-        if voice.duration > 300:
-            await message.reply_text("○ аудио слишком длинное (макс 5 мин). разбей на части )")
-            if os_module.path.exists(voice_path):
-                os_module.unlink(voice_path)
-            return
-
-        text = None
-        error_msg = None
-
-        # Try OpenAI Whisper API first (fast!)
-        openai_key = os_module.environ.get("OPENAI_API_KEY")
-        if openai_key:
-            try:
-                import requests
-                logger.info("Trying OpenAI Whisper API...")
-
-                with open(voice_path, "rb") as audio_file:
-                    response = requests.post(
-                        "https://api.openai.com/v1/audio/transcriptions",
-                        headers={"Authorization": f"Bearer {openai_key}"},
-                        files={"file": audio_file},
-                        data={"model": "whisper-1", "language": "ru"},
-                        timeout=60
-                    )
-
-                if response.ok:
-                    text = response.json().get("text", "").strip()
-                    logger.info(f"OpenAI Whisper OK: {text[:50]}...")
-                else:
-                    error_msg = f"OpenAI API: {response.status_code}"
-                    logger.warning(error_msg)
-            except Exception as e:
-                error_msg = f"OpenAI: {str(e)[:50]}"
-                logger.warning(error_msg)
-
-        # Fallback to Google Speech (for short audio only)
-        if not text:
-            try:
-                import subprocess
-                import speech_recognition as sr
-                logger.info("Trying Google Speech...")
-
-                wav_path = f"/tmp/voice_{voice.file_id}.wav"
-                result = subprocess.run(
-                    ["ffmpeg", "-y", "-i", voice_path, "-ar", "16000", "-ac", "1", wav_path],
-                    capture_output=True,
-                    timeout=30
-                )
-
-                if result.returncode != 0:
-                    error_msg = "ffmpeg не работает"
-                    logger.error(f"ffmpeg error: {result.stderr.decode()[:100]}")
-                else:
-                    recognizer = sr.Recognizer()
-                    with sr.AudioFile(wav_path) as source:
-                        audio = recognizer.record(source)
-                    text = recognizer.recognize_google(audio, language="ru-RU")
-                    logger.info(f"Google Speech OK: {text[:50]}...")
-
-                if os_module.path.exists(wav_path):
-                    os_module.unlink(wav_path)
-
-            except ImportError:
-                error_msg = "SpeechRecognition не установлен"
-                logger.error(error_msg)
-            except Exception as e:
-                error_msg = f"Speech: {str(e)[:50]}"
-                logger.error(error_msg)
-
-        # Clean up
-        if os_module.path.exists(voice_path):
-            os_module.unlink(voice_path)
-
+        text, error_msg = await transcribe_voice(message.voice)
         if not text:
             await message.reply_text(f"○ не смогла расшифровать: {error_msg or 'неизвестная ошибка'}")
             return
@@ -407,8 +340,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     update_last_message_time(chat_id)
 
     # Check if should respond
-    bot_username = (await context.bot.get_me()).username
-    caption_lower = caption.lower()
+    bot_username = context.bot.username
 
     is_reply_to_bot = (
         message.reply_to_message and
@@ -416,7 +348,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
         message.reply_to_message.from_user.id == context.bot.id
     )
     is_mention = f"@{bot_username}" in caption if bot_username else False
-    is_called = any(name in caption_lower for name in BOT_NAMES)
+    is_called = "name" in TRIGGERS.match(caption)
 
     if not (is_reply_to_bot or is_mention or is_called):
         return
@@ -860,7 +792,7 @@ async def upload_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 #mycelium #стартап #бизнес"""
 
-        description = await prisma.model.generate_content_async(desc_prompt)
+        description = await prisma.generate_content("youtube_description", desc_prompt)
         description_text = description.text.strip()
 
         # Generate tags
@@ -977,6 +909,27 @@ async def mute_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+async def refresh_routes(context: ContextTypes.DEFAULT_TYPE):
+    """Reload the DialogEngine routing index (chat -> project, topic threads)"""
+    supabase = get_supabase()
+    if supabase:
+        await get_dialog_engine(supabase).load_routes()
+
+
+async def extract_memories(context: ContextTypes.DEFAULT_TYPE, force: bool = False):
+    """Save important info from the chats' new messages to permanent memory, one LLM call per chat"""
+    batches = take_memory_batches(force)
+    if not batches:
+        return
+
+    prisma = get_prisma_client()
+    for chat_id, messages in batches.items():
+        try:
+            await prisma.extract_memories(chat_id, messages)
+        except Exception as e:
+            logger.error(f"Memory extraction error for {chat_id}: {e}")
+
+
 async def proactive_check(context: ContextTypes.DEFAULT_TYPE):
     """Proactive check - kick silent chats"""
 
@@ -1015,7 +968,7 @@ async def proactive_check(context: ContextTypes.DEFAULT_TYPE):
                 prisma = get_prisma_client()
                 message = await prisma.generate_kick_message(chat_id, kick_type)
 
-                await context.bot.send_message(chat_id=chat_id, text=message)
+                await context.bot.send_message(chat_id=chat_id, text=message, rate_limit_args=PRIORITY_BROADCAST)
                 log_message(chat_id, 0, "Prisma", "assistant", message)
                 update_last_kick_time(chat_id)
 
@@ -1075,7 +1028,7 @@ async def daily_checkin(context: ContextTypes.DEFAULT_TYPE):
 
             message = await prisma.generate_checkin_message(chat_id, checkin_type, prompt)
 
-            await context.bot.send_message(chat_id=chat_id, text=message)
+            await context.bot.send_message(chat_id=chat_id, text=message, rate_limit_args=PRIORITY_BROADCAST)
             log_message(chat_id, 0, "Prisma", "assistant", f"[{checkin_type.upper()}] {message}")
 
             logger.info(f"Sent {checkin_type} check-in to chat {chat_id}")
@@ -1084,6 +1037,26 @@ async def daily_checkin(context: ContextTypes.DEFAULT_TYPE):
             logger.error(f"Error sending check-in to {chat_id}: {e}")
 
 
+async def on_startup(app: Application):
+    """Start the /metrics endpoint and batched message logging, load the dialog routing index"""
+    app.bot_data["metrics_server"] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    start_log_writer()
+    await refresh_routes(None)
+
+
+async def on_shutdown(app: Application):
+    """Write queued logs, extract memories from the messages still waiting, close HTTP/metrics servers"""
+    await stop_log_writer()
+    try:
+        await asyncio.wait_for(extract_memories(None, force=True), timeout=MEMORY_SHUTDOWN_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning("Memory extraction cut short by shutdown")
+    await close_http_session()
+    metrics_server = app.bot_data.get("metrics_server")
+    if metrics_server:
+        await metrics_server.cleanup()
+
+
 def main():
     """Start Prisma bot"""
     if not PRISMA_BOT_TOKEN:
@@ -1095,7 +1068,15 @@ def main():
     logger.info("Starting Prisma bot...")
 
     # Create application
-    app = Application.builder().token(PRISMA_BOT_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(PRISMA_BOT_TOKEN)
+        .request(InstrumentedRequest())
+        .rate_limiter(OutboundRateLimiter())
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Add handlers
     app.add_handler(CommandHandler("start", start_command))
@@ -1133,6 +1114,7 @@ def main():
         filters.VOICE,
         handle_voice
     ))
+    instrument_handlers(app)
 
     # Add proactive job
     job_queue = app.job_queue
@@ -1141,6 +1123,16 @@ def main():
         interval=PROACTIVE_CHECK_MINUTES * 60,
         first=60  # Start after 1 minute
     )
+    job_queue.run_repeating(
+        extract_memories,
+        interval=60,  # Each chat is sent once it is due (MEMORY_BATCH_MESSAGES / MEMORY_BATCH_MINUTES)
+        first=60
+    )
+    job_queue.run_repeating(
+        refresh_routes,
+        interval=ROUTING_REFRESH_SECONDS,
+        first=ROUTING_REFRESH_SECONDS  # Initial load runs in on_startup
+    )
 
     # Schedule daily check-ins
     if PYTZ_AVAILABLE:
@@ -18,9 +18,52 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 # PostgreSQL Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 
+# In-memory chat context: last N formatted messages per chat (capped at a byte budget),
+# for at most CONTEXT_MAX_CHATS recently active chats
+CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", "50"))
+CONTEXT_MAX_BYTES = int(os.getenv("CONTEXT_MAX_BYTES", "65536"))
+CONTEXT_MAX_CHATS = int(os.getenv("CONTEXT_MAX_CHATS", "500"))
+
+# Permanent memory is extracted in the background, one LLM call per chat batch: sent once a
+# chat has MEMORY_BATCH_MESSAGES new messages or its oldest one has waited MEMORY_BATCH_MINUTES
+MEMORY_BATCH_MESSAGES = int(os.getenv("MEMORY_BATCH_MESSAGES", "20"))
+MEMORY_BATCH_MINUTES = float(os.getenv("MEMORY_BATCH_MINUTES", "10"))
+# On shutdown the messages still queued get at most this long for their extraction
+MEMORY_SHUTDOWN_SECONDS = float(os.getenv("MEMORY_SHUTDOWN_SECONDS", "10"))
+
+# chat_logs rows (and bot_settings.last_message_at) are written behind, in one transaction
+# per flush: every LOG_FLUSH_SECONDS, or as soon as LOG_BATCH_SIZE rows are waiting;
+# rows of failed flushes are retried, at most LOG_MAX_PENDING kept
+LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "1"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_MAX_PENDING = int(os.getenv("LOG_MAX_PENDING", "10000"))
+
+# Voice transcripts cached by Telegram file_unique_id (least recently used dropped past the limit)
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "5000"))
+# A cache hit refreshes last_used_at at most this often (LRU precision vs. a write per hit)
+TRANSCRIPT_TOUCH_SECONDS = int(os.getenv("TRANSCRIPT_TOUCH_SECONDS", "3600"))
+# Trim the cache to TRANSCRIPT_CACHE_MAX_ENTRIES on the first save and then every N saves
+TRANSCRIPT_PRUNE_EVERY = int(os.getenv("TRANSCRIPT_PRUNE_EVERY", "100"))
+
 # Supabase (shared with mcards for workspace context)
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
+# DialogEngine routing index (chat -> project, topic threads): full reload interval,
+# and how long "this chat has no project" is trusted before asking Supabase again
+ROUTING_REFRESH_SECONDS = int(os.getenv("ROUTING_REFRESH_SECONDS", "300"))
+ROUTING_NEGATIVE_TTL_SECONDS = float(os.getenv("ROUTING_NEGATIVE_TTL_SECONDS", "60"))
+# How long a chat's project + cards context is reused before re-reading Supabase
+PROJECT_CONTEXT_TTL_SECONDS = float(os.getenv("PROJECT_CONTEXT_TTL_SECONDS", "120"))
+# ... and "this chat has no project", kept short so a newly linked chat gets its context soon
+PROJECT_CONTEXT_NEGATIVE_TTL_SECONDS = float(os.getenv("PROJECT_CONTEXT_NEGATIVE_TTL_SECONDS", "15"))
+
+# Gemini calls: give up after LLM_TIMEOUT_SECONDS; sync-only calls (images) share LLM_MAX_WORKERS threads
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "4"))
+
+# Prometheus-style metrics: GET /metrics on its own port (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9091"))
 
 # Bot personality
 BOT_NAME = "Prisma"
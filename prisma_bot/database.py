@@ -1,9 +1,31 @@
+import asyncio
+import itertools
 import logging
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, BigInteger
+from typing import Deque, Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, BigInteger, UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.sql import column, table, text
+from config import (
+    DATABASE_URL,
+    CONTEXT_MAX_MESSAGES,
+    CONTEXT_MAX_BYTES,
+    CONTEXT_MAX_CHATS,
+    MEMORY_BATCH_MESSAGES,
+    MEMORY_BATCH_MINUTES,
+    LOG_FLUSH_SECONDS,
+    LOG_BATCH_SIZE,
+    LOG_MAX_PENDING,
+    TRANSCRIPT_CACHE_MAX_ENTRIES,
+    TRANSCRIPT_TOUCH_SECONDS,
+    TRANSCRIPT_PRUNE_EVERY
+)
+from metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +68,126 @@ class PermanentMemory(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 
+class VoiceTranscript(Base):
+    """Cached voice note transcripts, one per Telegram file and transcription backend"""
+    __tablename__ = 'voice_transcripts'
+    __table_args__ = (UniqueConstraint('file_unique_id', 'backend'),)
+
+    id = Column(Integer, primary_key=True)
+    file_unique_id = Column(String(64), index=True)
+    backend = Column(String(20))  # 'whisper' or 'google'
+    content = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ContextWindow:
+    """
+    Per-chat ring buffer of formatted context lines ("[name]: text")
+
+    Warmed from chat_logs on a chat's first read, then kept current by
+    log_message, so building a prompt costs no query and no re-format.
+    Each chat keeps at most max_lines lines and max_bytes of text (oldest
+    dropped first); past max_chats the least recently used chat is evicted.
+    """
+
+    def __init__(self, max_lines: int, max_bytes: int, max_chats: int):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[int, Deque[str]]" = OrderedDict()
+        self._bytes: Dict[int, int] = {}
+
+    def _push(self, chat_id: int, lines: Deque[str], line: str):
+        lines.append(line)
+        self._bytes[chat_id] += len(line.encode())
+        while len(lines) > self.max_lines or (self._bytes[chat_id] > self.max_bytes and len(lines) > 1):
+            self._bytes[chat_id] -= len(lines.popleft().encode())
+
+    def get(self, chat_id: int) -> Optional[List[str]]:
+        """Lines of a warm chat (oldest first), None if not loaded"""
+        lines = self._chats.get(chat_id)
+        if lines is None:
+            return None
+        self._chats.move_to_end(chat_id)
+        return list(lines)
+
+    def load(self, chat_id: int, lines: List[str]) -> List[str]:
+        """Replace a chat's lines (oldest first); returns what was kept"""
+        buffer: Deque[str] = deque()
+        self._chats[chat_id] = buffer
+        self._chats.move_to_end(chat_id)
+        self._bytes[chat_id] = 0
+        for line in lines:
+            self._push(chat_id, buffer, line)
+
+        while len(self._chats) > self.max_chats:
+            evicted, _ = self._chats.popitem(last=False)
+            del self._bytes[evicted]
+        return list(buffer)
+
+    def append(self, chat_id: int, line: str):
+        """Add a new line to a warm chat; cold chats pick it up from the DB when loaded"""
+        lines = self._chats.get(chat_id)
+        if lines is not None:
+            self._push(chat_id, lines, line)
+
+
+_context_window = ContextWindow(CONTEXT_MAX_MESSAGES, CONTEXT_MAX_BYTES, CONTEXT_MAX_CHATS)
+
+
+class MemoryBacklog:
+    """
+    User messages logged since the last memory extraction, per chat
+
+    log_message adds to it; the background extractor takes whole chats once
+    they have enough messages or their oldest message has waited long enough.
+    A chat keeps at most max_per_chat messages (oldest dropped first).
+    """
+
+    def __init__(self, max_per_chat: int):
+        self.max_per_chat = max_per_chat
+        self._chats: Dict[int, Deque[Tuple[str, str]]] = {}
+        self._since: Dict[int, float] = {}  # chat_id -> monotonic time of the oldest message
+
+    def add(self, chat_id: int, user_name: str, content: str):
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            messages = self._chats[chat_id] = deque(maxlen=self.max_per_chat)
+            self._since[chat_id] = time.monotonic()
+        messages.append((user_name, content))
+
+    def take(self, min_messages: int, max_age: float, force: bool = False) -> Dict[int, List[Tuple[str, str]]]:
+        """Remove and return {chat_id: [(user_name, content)]} of the chats that are due"""
+        now = time.monotonic()
+        due = [
+            chat_id for chat_id, messages in self._chats.items()
+            if force or len(messages) >= min_messages or now - self._since[chat_id] >= max_age
+        ]
+        batches = {}
+        for chat_id in due:
+            batches[chat_id] = list(self._chats.pop(chat_id))
+            del self._since[chat_id]
+        return batches
+
+
+# Shorter messages are never worth remembering
+_MEMORY_MIN_LENGTH = 20
+
+_memory_backlog = MemoryBacklog(MEMORY_BATCH_MESSAGES * 4)
+
+
+def take_memory_batches(force: bool = False) -> Dict[int, List[Tuple[str, str]]]:
+    """Chats due for memory extraction with their new messages (all chats if force)"""
+    return _memory_backlog.take(MEMORY_BATCH_MESSAGES, MEMORY_BATCH_MINUTES * 60, force)
+
+
+def format_context_line(role: str, user_name: str, content: str) -> str:
+    """One message as it appears in the prompt context"""
+    name = "prisma" if role == "assistant" else user_name
+    return f"[{name}]: {content}"
+
+
 # Database connection
 engine = None
 SessionLocal = None
@@ -76,24 +218,187 @@ def get_session():
     return SessionLocal()
 
 
-def log_message(chat_id: int, user_id: int, user_name: str, role: str, content: str):
-    """Log a message to the database"""
+class ChatLogWriter:
+    """
+    Write-behind buffer for chat_logs rows and bot_settings.last_message_at
+
+    Once started, rows are queued and written by a background task in one
+    transaction per flush (executemany insert, one last_message_at upsert
+    per chat), every `interval` seconds or as soon as `batch_size` rows wait.
+    A failed flush puts its rows back for the next one, keeping at most
+    max_pending rows (oldest dropped first).
+    Until started (or after stop) every call is written straight away.
+    """
+
+    def __init__(self, batch_size: int, interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self._rows: List[Dict] = []
+        self._flushing: List[Dict] = []  # rows taken by a flush that may not be committed yet
+        self._last_message_at: Dict[int, datetime] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def add(self, row: Dict):
+        if self._task is None:
+            _write_chat_logs([row], {})
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    def touch(self, chat_id: int, at: datetime):
+        if self._task is None:
+            _write_chat_logs([], {chat_id: at})
+            return
+        self._last_message_at[chat_id] = at
+
+    def unflushed(self, chat_id: int) -> List[Dict]:
+        """Rows of a chat not known to be in the DB yet, oldest first"""
+        return [row for row in self._flushing + self._rows if row["chat_id"] == chat_id]
+
+    def start(self):
+        """Start the background flush task (needs a running event loop)"""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Let the flush task finish its current flush, then write everything still queued"""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        if not await self.flush():
+            logger.error(f"Dropping {len(self._rows)} unwritten messages on shutdown")
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write everything queued; on failure it stays queued (False)"""
+        async with self._lock:
+            if not self._rows and not self._last_message_at:
+                return True
+            rows, self._rows = self._rows, []
+            last_message_at, self._last_message_at = self._last_message_at, {}
+            self._flushing = rows
+            try:
+                ok = await asyncio.to_thread(_write_chat_logs, rows, last_message_at)
+            finally:
+                self._flushing = []
+            if not ok:
+                self._requeue(rows, last_message_at)
+            return ok
+
+    def _requeue(self, rows: List[Dict], last_message_at: Dict[int, datetime]):
+        self._rows = rows + self._rows
+        excess = len(self._rows) - self.max_pending
+        if excess > 0:
+            logger.error(f"Chat log buffer full, dropping {excess} oldest messages")
+            del self._rows[:excess]
+        for chat_id, at in last_message_at.items():
+            # A newer touch queued meanwhile wins
+            self._last_message_at.setdefault(chat_id, at)
+
+
+# Just the columns _write_chat_logs touches (older bot_settings tables may lack the others)
+_last_message_table = table("bot_settings", column("chat_id"), column("last_message_at"))
+
+
+def _upsert_last_message_at(session, last_message_at: Dict[int, datetime]):
+    """bot_settings.last_message_at for each chat in one INSERT ... ON CONFLICT DO UPDATE"""
+    dialect = session.bind.dialect.name
+    insert = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}.get(dialect)
+    if insert is None:
+        # No ON CONFLICT in this dialect: update, then insert the chats that had no row
+        for chat_id, at in last_message_at.items():
+            result = session.execute(
+                text("UPDATE bot_settings SET last_message_at = :now WHERE chat_id = :chat_id"),
+                {"now": at, "chat_id": chat_id}
+            )
+            if result.rowcount == 0:
+                session.execute(
+                    text("INSERT INTO bot_settings (chat_id, last_message_at) VALUES (:chat_id, :now)"),
+                    {"chat_id": chat_id, "now": at}
+                )
+        return
+
+    stmt = insert(_last_message_table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["chat_id"],
+        set_={"last_message_at": stmt.excluded.last_message_at}
+    )
+    session.execute(stmt, [
+        {"chat_id": chat_id, "last_message_at": at} for chat_id, at in last_message_at.items()
+    ])
+
+
+@timed("db_latency_seconds")
+def _write_chat_logs(rows: List[Dict], last_message_at: Dict[int, datetime]) -> bool:
+    """Insert chat_logs rows and upsert bot_settings.last_message_at, in one commit"""
+    session = None
     try:
         session = get_session()
-        log = ChatLog(
-            chat_id=chat_id,
-            user_id=user_id,
-            user_name=user_name,
-            role=role,
-            content=content[:4000]  # Truncate if too long
-        )
-        session.add(log)
+        if rows:
+            session.execute(ChatLog.__table__.insert(), rows)
+        if last_message_at:
+            _upsert_last_message_at(session, last_message_at)
         session.commit()
-        session.close()
+        return True
     except Exception as e:
-        logger.error(f"Error logging message: {e}")
+        logger.error(f"Error logging {len(rows)} messages: {e}")
+        return False
+    finally:
+        if session is not None:
+            session.close()
+
+
+_log_writer = ChatLogWriter(LOG_BATCH_SIZE, LOG_FLUSH_SECONDS, LOG_MAX_PENDING)
+
+
+def start_log_writer():
+    """Switch log_message / update_last_message_time to batched writes (call from the bot's loop)"""
+    _log_writer.start()
+
 
+async def stop_log_writer():
+    """Write all queued messages and go back to direct writes"""
+    await _log_writer.stop()
 
+
+def log_message(chat_id: int, user_id: int, user_name: str, role: str, content: str):
+    """Log a message to the chat's context window and (write-behind) to the database"""
+    content = content[:4000]  # Truncate if too long
+    _context_window.append(chat_id, format_context_line(role, user_name, content))
+    if role == "user" and len(content) >= _MEMORY_MIN_LENGTH:
+        _memory_backlog.add(chat_id, user_name, content)
+    _log_writer.add({
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "user_name": user_name,
+        "role": role,
+        "content": content,
+        "timestamp": datetime.utcnow()
+    })
+
+
+@timed("db_latency_seconds")
 def get_recent_messages(chat_id: int, limit: int = 20) -> list:
     """Get recent messages from a chat for context"""
     try:
@@ -110,33 +415,45 @@ def get_recent_messages(chat_id: int, limit: int = 20) -> list:
         return []
 
 
-def update_last_message_time(chat_id: int):
-    """Update the last message timestamp for a chat"""
+@timed("db_latency_seconds")
+def _load_context_lines(chat_id: int, limit: int, before: Optional[datetime] = None) -> List[str]:
+    """Last `limit` messages of a chat from the DB (older than `before`), formatted, oldest first"""
+    session = get_session()
     try:
-        session = get_session()
-        from sqlalchemy import text
-        now = datetime.utcnow()
-
-        # Try upsert with raw SQL to avoid ORM issues with missing columns
-        # First try update
-        result = session.execute(
-            text("UPDATE bot_settings SET last_message_at = :now WHERE chat_id = :chat_id"),
-            {"now": now, "chat_id": chat_id}
+        query = session.query(ChatLog.role, ChatLog.user_name, ChatLog.content).filter(
+            ChatLog.chat_id == chat_id
         )
+        if before is not None:
+            query = query.filter(ChatLog.timestamp < before)
+        rows = query.order_by(ChatLog.timestamp.desc()).limit(limit).all()
+    finally:
+        session.close()
+    return [format_context_line(role, user_name, content) for role, user_name, content in reversed(rows)]
 
-        if result.rowcount == 0:
-            # Insert if not exists
-            session.execute(
-                text("INSERT INTO bot_settings (chat_id, last_message_at) VALUES (:chat_id, :now)"),
-                {"chat_id": chat_id, "now": now}
-            )
 
-        session.commit()
-        session.close()
+def get_context_lines(chat_id: int) -> List[str]:
+    """Recent messages of a chat formatted for the prompt (from memory once warm)"""
+    lines = _context_window.get(chat_id)
+    if lines is not None:
+        return lines
+    # Messages still queued for the DB come after everything the query can see
+    pending = _log_writer.unflushed(chat_id)
+    try:
+        lines = _load_context_lines(chat_id, CONTEXT_MAX_MESSAGES, pending[0]["timestamp"] if pending else None)
     except Exception as e:
-        logger.error(f"Error updating last message time: {e}")
+        # Not cached, so the next read retries the DB
+        logger.error(f"Error loading context for chat {chat_id}: {e}")
+        return []
+    lines += [format_context_line(row["role"], row["user_name"], row["content"]) for row in pending]
+    return _context_window.load(chat_id, lines)
+
+
+def update_last_message_time(chat_id: int):
+    """Update the last message timestamp for a chat (written with the next log flush)"""
+    _log_writer.touch(chat_id, datetime.utcnow())
 
 
+@timed("db_latency_seconds")
 def get_silence_duration(chat_id: int) -> float:
     """Get hours since last message in chat"""
     try:
@@ -158,6 +475,7 @@ def get_silence_duration(chat_id: int) -> float:
         return 0
 
 
+@timed("db_latency_seconds")
 def update_last_kick_time(chat_id: int):
     """Update when we last kicked the chat"""
     try:
@@ -173,6 +491,7 @@ def update_last_kick_time(chat_id: int):
         logger.error(f"Error updating last kick time: {e}")
 
 
+@timed("db_latency_seconds")
 def get_all_active_chats() -> list:
     """Get all chats with settings"""
     try:
@@ -188,6 +507,7 @@ def get_all_active_chats() -> list:
         return []
 
 
+@timed("db_latency_seconds")
 def get_today_messages(chat_id: int) -> list:
     """Get all messages from today for daily summary"""
     try:
@@ -208,6 +528,7 @@ def get_today_messages(chat_id: int) -> list:
 
 # === PERMANENT MEMORY FUNCTIONS ===
 
+@timed("db_latency_seconds")
 def add_memory(chat_id: int, category: str, content: str, added_by: str = "prisma") -> bool:
     """Add a permanent memory entry"""
     try:
@@ -228,6 +549,32 @@ def add_memory(chat_id: int, category: str, content: str, added_by: str = "prism
         return False
 
 
+@timed("db_latency_seconds")
+def add_memories(chat_id: int, items: List[Dict[str, str]], added_by: str = "prisma") -> int:
+    """Add several {category, content[, added_by]} memory entries in one insert; returns how many"""
+    if not items:
+        return 0
+    try:
+        session = get_session()
+        session.execute(PermanentMemory.__table__.insert(), [
+            {
+                "chat_id": chat_id,
+                "category": item["category"],
+                "content": item["content"][:2000],  # Limit size
+                "added_by": item.get("added_by") or added_by
+            }
+            for item in items
+        ])
+        session.commit()
+        session.close()
+        logger.info(f"Added {len(items)} memories for chat {chat_id}")
+        return len(items)
+    except Exception as e:
+        logger.error(f"Error adding memories: {e}")
+        return 0
+
+
+@timed("db_latency_seconds")
 def get_all_memories(chat_id: int) -> list:
     """Get all permanent memories for a chat"""
     try:
@@ -242,6 +589,7 @@ def get_all_memories(chat_id: int) -> list:
         return []
 
 
+@timed("db_latency_seconds")
 def get_memories_by_category(chat_id: int, category: str) -> list:
     """Get memories by category"""
     try:
@@ -257,6 +605,7 @@ def get_memories_by_category(chat_id: int, category: str) -> list:
         return []
 
 
+@timed("db_latency_seconds")
 def delete_memory(memory_id: int) -> bool:
     """Delete a memory by ID"""
     try:
@@ -291,8 +640,79 @@ def get_memory_context(chat_id: int, limit: int = 20) -> str:
         return ""
 
 
+# === VOICE TRANSCRIPT CACHE ===
+
+@timed("db_latency_seconds")
+def get_transcript(file_unique_id: str, backends: Tuple[str, ...]) -> Optional[Tuple[str, str]]:
+    """Cached (backend, text) for a voice file, first backend in `backends` order; None if not cached"""
+    try:
+        session = get_session()
+        rows = {
+            row.backend: row for row in session.query(VoiceTranscript).filter(
+                VoiceTranscript.file_unique_id == file_unique_id
+            ).all()
+        }
+        row = next((rows[backend] for backend in backends if backend in rows), None)
+        if row is None:
+            session.close()
+            return None
+
+        now = datetime.utcnow()
+        if row.last_used_at is None or (now - row.last_used_at).total_seconds() >= TRANSCRIPT_TOUCH_SECONDS:
+            row.last_used_at = now
+            session.commit()
+        cached = (row.backend, row.content)
+        session.close()
+        return cached
+    except Exception as e:
+        logger.error(f"Error reading transcript cache: {e}")
+        return None
+
+
+# Saves since startup (so the first save after a restart prunes too)
+_transcript_saves = itertools.count()
+
+
+def _prune_transcripts(session):
+    """Drop the least recently used transcripts beyond TRANSCRIPT_CACHE_MAX_ENTRIES"""
+    excess = session.query(VoiceTranscript).count() - TRANSCRIPT_CACHE_MAX_ENTRIES
+    if excess > 0:
+        stale = session.query(VoiceTranscript.id).order_by(
+            VoiceTranscript.last_used_at.asc()
+        ).limit(excess).subquery()
+        session.query(VoiceTranscript).filter(
+            VoiceTranscript.id.in_(stale.select())
+        ).delete(synchronize_session=False)
+
+
+@timed("db_latency_seconds")
+def save_transcript(file_unique_id: str, backend: str, content: str):
+    """
+    Cache a transcript
+
+    Every TRANSCRIPT_PRUNE_EVERY saves the least recently used beyond
+    TRANSCRIPT_CACHE_MAX_ENTRIES are dropped (counting the table is a scan).
+    """
+    try:
+        session = get_session()
+        session.query(VoiceTranscript).filter(
+            VoiceTranscript.file_unique_id == file_unique_id,
+            VoiceTranscript.backend == backend
+        ).delete()
+        session.add(VoiceTranscript(file_unique_id=file_unique_id, backend=backend, content=content))
+
+        if next(_transcript_saves) % TRANSCRIPT_PRUNE_EVERY == 0:
+            _prune_transcripts(session)
+
+        session.commit()
+        session.close()
+    except Exception as e:
+        logger.error(f"Error saving transcript: {e}")
+
+
 # === MUTE FUNCTIONS ===
 
+@timed("db_latency_seconds")
 def is_chat_muted(chat_id: int) -> bool:
     """Check if chat is muted"""
     try:
@@ -311,6 +731,7 @@ def is_chat_muted(chat_id: int) -> bool:
         return False
 
 
+@timed("db_latency_seconds")
 def set_chat_muted(chat_id: int, muted: bool) -> bool:
     """Set chat mute status"""
     try:
@@ -1,10 +1,13 @@
+import functools
 import logging
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
-from config import GEMINI_API_KEY, get_system_prompt
-from database import get_recent_messages, get_memory_context, add_memory
+from config import GEMINI_API_KEY, LLM_TIMEOUT_SECONDS, LLM_MAX_WORKERS, get_system_prompt
+from database import get_context_lines, get_memory_context, add_memories
 from supabase_client import build_project_context, get_project_by_chat_id, save_ai_message
+from metrics import await_llm
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,12 @@ GITHUB_KEYWORDS = [
     "issue", "ишью", "бранч", "branch", "ветка", "деплой", "deploy"
 ]
 
+# Permanent memory categories extract_memories may save
+MEMORY_CATEGORIES = ("decision", "task", "insight", "fact", "blocker", "progress")
+
+# Sync-only Gemini calls run here so they never block the event loop
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="gemini")
+
 
 class PrismaGemini:
     def __init__(self):
@@ -40,6 +49,10 @@ class PrismaGemini:
         )
         logger.info("Prisma Gemini initialized")
 
+    async def generate_content(self, call: str, contents):
+        """Async Gemini call (await_llm: asyncio.TimeoutError after LLM_TIMEOUT_SECONDS)"""
+        return await await_llm(call, self.model.generate_content_async(contents), LLM_TIMEOUT_SECONDS)
+
     def _build_context(self, chat_id: int) -> str:
         """Build context from recent messages, permanent memory, and project data"""
         # Get project context from Supabase (cards, project info)
@@ -48,17 +61,9 @@ class PrismaGemini:
         # Get permanent memory
         memory_context = get_memory_context(chat_id, limit=15)
 
-        # Get recent messages
-        messages = get_recent_messages(chat_id, limit=50)
-
-        if not messages:
-            message_context = "нет предыдущих сообщений"
-        else:
-            context_lines = []
-            for msg in messages:
-                role = "prisma" if msg.role == "assistant" else msg.user_name
-                context_lines.append(f"[{role}]: {msg.content}")
-            message_context = "\n".join(context_lines)
+        # Get recent messages (already formatted, kept in memory per chat)
+        context_lines = get_context_lines(chat_id)
+        message_context = "\n".join(context_lines) if context_lines else "нет предыдущих сообщений"
 
         # Combine all context: project + memory + messages
         parts = []
@@ -131,7 +136,7 @@ class PrismaGemini:
 
 твой ответ:"""
 
-            response = self.model.generate_content(full_prompt)
+            response = await self.generate_content("generate_response", full_prompt)
             response_text = response.text.strip()
 
             # Save to Supabase if project exists
@@ -140,28 +145,37 @@ class PrismaGemini:
                 save_ai_message(project["id"], user_id, "prisma", "user", message)
                 save_ai_message(project["id"], user_id, "prisma", "assistant", response_text)
 
-            # Try to auto-save important info (fire and forget)
-            try:
-                await self._analyze_and_save_memory(chat_id, user_name, message)
-            except Exception as e:
-                logger.debug(f"Memory save skipped: {e}")
-
             return response_text
 
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
             return self._get_fallback_response()
 
-    async def _analyze_and_save_memory(self, chat_id: int, user_name: str, message: str):
-        """Analyze message and save important info to permanent memory"""
-        # Skip short messages
-        if len(message) < 20:
-            return
+    async def extract_memories(self, chat_id: int, messages: list) -> int:
+        """
+        Save important info from a batch of chat messages to permanent memory
+
+        One Gemini call for the whole batch (see database.take_memory_batches).
+
+        Args:
+            chat_id: Telegram chat_id
+            messages: [(user_name, content)], oldest first
+
+        Returns:
+            Number of memories saved (each added_by the author of its message)
+        """
+        if not messages:
+            return 0
+
+        dialog = "\n".join(
+            f"#{number} [{user_name}]: {content}"
+            for number, (user_name, content) in enumerate(messages, 1)
+        )
+        analysis_prompt = f"""Проанализируй эти сообщения из чата проекта:
 
-        analysis_prompt = f"""Проанализируй это сообщение от {user_name}:
-"{message}"
+{dialog}
 
-Определи, содержит ли оно ВАЖНУЮ информацию для проекта, которую стоит запомнить навсегда.
+Найди в них ВАЖНУЮ информацию для проекта, которую стоит запомнить навсегда.
 
 Категории для сохранения:
 - decision: принятое решение по проекту
@@ -171,15 +185,15 @@ class PrismaGemini:
 - blocker: блокер или проблема
 - progress: значимый прогресс или достижение
 
-Если сообщение НЕ содержит важной информации (обычная болтовня, вопрос, короткий ответ) — верни пустой JSON: {{}}
+Обычную болтовню, вопросы и короткие ответы пропускай. Одно и то же не повторяй.
 
-Если содержит — верни JSON:
-{{"category": "категория", "content": "краткое описание на русском, 1-2 предложения"}}
+Верни JSON-массив (пустой [], если важного нет), message — номер сообщения, откуда взята информация:
+[{{"message": номер, "category": "категория", "content": "краткое описание на русском, 1-2 предложения"}}]
 
 ТОЛЬКО JSON, без пояснений:"""
 
         try:
-            response = self.model.generate_content(analysis_prompt)
+            response = await self.generate_content("extract_memories", analysis_prompt)
             text = response.text.strip()
 
             # Clean up response
@@ -189,23 +203,35 @@ class PrismaGemini:
                     text = text[4:]
             text = text.strip()
 
-            if not text or text == "{}":
-                return
-
-            data = json.loads(text)
-            if data and "category" in data and "content" in data:
-                add_memory(
-                    chat_id=chat_id,
-                    category=data["category"],
-                    content=data["content"],
-                    added_by=user_name
-                )
-                logger.info(f"Auto-saved memory: [{data['category']}] {data['content'][:50]}...")
+            data = json.loads(text) if text else []
+            if not isinstance(data, list):
+                data = [data]
+            authors = {user_name for user_name, _ in messages}
+            items = []
+            for item in data:
+                if not (
+                    isinstance(item, dict)
+                    and item.get("category") in MEMORY_CATEGORIES
+                    and isinstance(item.get("content"), str) and item["content"].strip()
+                ):
+                    continue
+                # Credit the speaker; "prisma" only if the message can't be told
+                number = item.get("message")
+                if isinstance(number, int) and 1 <= number <= len(messages):
+                    item["added_by"] = messages[number - 1][0]
+                elif len(authors) == 1:
+                    item["added_by"] = next(iter(authors))
+                items.append(item)
+            saved = add_memories(chat_id, items)
+            if saved:
+                logger.info(f"Auto-saved {saved} memories from {len(messages)} messages in chat {chat_id}")
+            return saved
 
         except json.JSONDecodeError:
-            pass  # Not valid JSON, skip
+            return 0  # Not valid JSON, skip
         except Exception as e:
-            logger.debug(f"Memory analysis failed: {e}")
+            logger.debug(f"Memory extraction failed: {e}")
+            return 0
 
     async def generate_response_with_image(self, chat_id: int, user_name: str, message: str, image_bytes: bytes, user_id: int = None) -> str:
         """Generate response to an image"""
@@ -225,7 +251,13 @@ class PrismaGemini:
 
 проанализируй картинку и ответь в своем стиле:"""
 
-            response = self.model.generate_content([prompt, image])
+            # Sync SDK call for images, on the bounded thread pool
+            response = await await_llm(
+                "generate_response_with_image",
+                functools.partial(self.model.generate_content, [prompt, image]),
+                LLM_TIMEOUT_SECONDS,
+                _executor
+            )
             response_text = response.text.strip()
 
             # Save to Supabase if project exists
@@ -261,7 +293,7 @@ class PrismaGemini:
 
 твое сообщение:"""
 
-            response = self.model.generate_content(prompt)
+            response = await self.generate_content("generate_kick_message", prompt)
             return response.text.strip()
 
         except Exception as e:
@@ -283,7 +315,7 @@ class PrismaGemini:
 
 твое сообщение:"""
 
-            response = self.model.generate_content(full_prompt)
+            response = await self.generate_content("generate_checkin_message", full_prompt)
             return response.text.strip()
 
         except Exception as e:
@@ -3,8 +3,10 @@ Dialog Engine - State Machine for IDEA phase questionnaire.
 Manages the conversation flow for filling out cards.
 """
 
+import asyncio
 import logging
 import json
+import time
 from typing import Optional, Dict, Tuple
 from dataclasses import dataclass
 from enum import Enum
@@ -20,9 +22,17 @@ from data.questions import (
     get_card_completion_message,
     get_team_voting
 )
+from config import ROUTING_NEGATIVE_TTL_SECONDS
+from metrics import timed
+from supabase_client import invalidate_project_context
 
 logger = logging.getLogger(__name__)
 
+# projects.topics keys holding a topic's message_thread_id ("idea_thread_id")
+_THREAD_SUFFIX = "_thread_id"
+# Rows per request when bulk-loading the routing index
+_ROUTES_PAGE_SIZE = 1000
+
 
 class DialogState(Enum):
     """Possible states in the dialog flow"""
@@ -64,9 +74,94 @@ class DialogEngine:
         """
         self.supabase = supabase_client
         self._contexts: Dict[str, DialogContext] = {}  # In-memory cache
+        # Routing index (see ROUTING below)
+        self._project_by_chat: Dict[int, str] = {}
+        self._topics_by_project: Dict[str, Dict[int, str]] = {}
+        self._no_project: Dict[int, float] = {}  # chat_id -> monotonic expiry
+        # (project_id, threads, chat_id) indexed while load_routes is reading, None when idle
+        self._indexed_during_load: Optional[list] = None
         logger.info("DialogEngine initialized")
 
     # ==================== ROUTING ====================
+    #
+    # chat_id -> project_id and project_id -> {thread_id: topic} live in
+    # memory: bulk-loaded by load_routes() at startup and on a timer, filled
+    # in by single lookups for chats/projects the last load did not see.
+    # Chats without a project are remembered for ROUTING_NEGATIVE_TTL_SECONDS.
+
+    @staticmethod
+    def _topic_threads(topics: Optional[Dict]) -> Dict[int, str]:
+        """{"idea_thread_id": 12, ...} -> {12: "idea", ...}"""
+        return {
+            thread_id: key[:-len(_THREAD_SUFFIX)]
+            for key, thread_id in (topics or {}).items()
+            if key.endswith(_THREAD_SUFFIX) and thread_id
+        }
+
+    def _index_project(self, project_id: str, threads: Dict[int, str], chat_id: Optional[int] = None):
+        """Add one project to the index (kept across a reload that is running)"""
+        self._topics_by_project[project_id] = threads
+        if chat_id is not None:
+            self._project_by_chat[chat_id] = project_id
+        if self._indexed_during_load is not None:
+            self._indexed_during_load.append((project_id, threads, chat_id))
+
+    @timed("supabase_latency_seconds")
+    def _read_routes(self) -> Tuple[Dict[int, str], Dict[str, Dict[int, str]]]:
+        """All chat -> project and project -> topic threads maps from Supabase (only DB reads)"""
+        project_by_chat: Dict[int, str] = {}
+        topics_by_project: Dict[str, Dict[int, str]] = {}
+        start = 0
+        while True:
+            rows = self.supabase.table("projects")\
+                .select("id, telegram_group_id, topics")\
+                .not_.is_("telegram_group_id", "null")\
+                .range(start, start + _ROUTES_PAGE_SIZE - 1)\
+                .execute().data or []
+            for row in rows:
+                project_by_chat[row["telegram_group_id"]] = row["id"]
+                topics_by_project[row["id"]] = self._topic_threads(row.get("topics"))
+            if len(rows) < _ROUTES_PAGE_SIZE:
+                return project_by_chat, topics_by_project
+            start += _ROUTES_PAGE_SIZE
+
+    async def load_routes(self) -> int:
+        """
+        Reload the whole routing index from Supabase.
+
+        The reads run in a thread; the index is swapped on the event loop,
+        keeping whatever was indexed meanwhile (stored topics, single lookups).
+
+        Returns:
+            Number of projects linked to a chat, or -1 if the load failed
+        """
+        if not self.supabase or self._indexed_during_load is not None:
+            return -1
+
+        self._indexed_during_load = []
+        try:
+            project_by_chat, topics_by_project = await asyncio.to_thread(self._read_routes)
+        except Exception as e:
+            logger.error(f"Error loading dialog routes: {e}")
+            return -1
+        finally:
+            indexed, self._indexed_during_load = self._indexed_during_load, None
+
+        for project_id, threads, chat_id in indexed:
+            topics_by_project[project_id] = threads
+            if chat_id is not None:
+                project_by_chat[chat_id] = project_id
+
+        # Swap whole dicts so readers never see a half-built index
+        self._project_by_chat = project_by_chat
+        self._topics_by_project = topics_by_project
+        now = time.monotonic()
+        self._no_project = {
+            chat_id: expires for chat_id, expires in self._no_project.items()
+            if expires > now and chat_id not in project_by_chat
+        }
+        logger.info(f"Loaded dialog routes for {len(project_by_chat)} chats")
+        return len(project_by_chat)
 
     def should_handle_message(self, project_id: str, thread_id: int, topic_name: str = None) -> bool:
         """
@@ -83,37 +178,40 @@ class DialogEngine:
         if not self.supabase:
             return False
 
-        try:
-            # Get project topics from database
-            result = self.supabase.table("projects")\
-                .select("topics, current_phase")\
-                .eq("id", project_id)\
-                .execute()
-
-            if not result.data:
+        threads = self._topics_by_project.get(project_id)
+        if threads is None:
+            try:
+                threads = self._fetch_topics(project_id)
+            except Exception as e:
+                logger.error(f"Error checking topic: {e}")
                 return False
 
-            topics = result.data[0].get("topics") or {}
-            idea_thread_id = topics.get("idea_thread_id")
+        # If idea_thread_id is stored and matches - handle it
+        if threads.get(thread_id) == "idea":
+            return True
 
-            # If idea_thread_id is stored and matches - handle it
-            if idea_thread_id and idea_thread_id == thread_id:
+        # If no idea_thread_id stored yet but we have topic_name, check it
+        if topic_name:
+            name_lower = topic_name.lower().strip()
+            if name_lower in ["idea", "идея", "#idea", "#идея", "💡 idea", "💡 идея"]:
+                # Store this thread_id for future
+                self._store_topic_thread_id(project_id, "idea_thread_id", thread_id)
                 return True
 
-            # If no idea_thread_id stored yet but we have topic_name, check it
-            if topic_name:
-                name_lower = topic_name.lower().strip()
-                if name_lower in ["idea", "идея", "#idea", "#идея", "💡 idea", "💡 идея"]:
-                    # Store this thread_id for future
-                    self._store_topic_thread_id(project_id, "idea_thread_id", thread_id)
-                    return True
+        return False
 
-            return False
-
-        except Exception as e:
-            logger.error(f"Error checking topic: {e}")
-            return False
+    @timed("supabase_latency_seconds")
+    def _fetch_topics(self, project_id: str) -> Dict[int, str]:
+        """Topic threads of one project from Supabase, added to the index"""
+        result = self.supabase.table("projects")\
+            .select("topics")\
+            .eq("id", project_id)\
+            .execute()
+        threads = self._topic_threads(result.data[0].get("topics") if result.data else None)
+        self._index_project(project_id, threads)
+        return threads
 
+    @timed("supabase_latency_seconds")
     def _store_topic_thread_id(self, project_id: str, topic_key: str, thread_id: int) -> bool:
         """Store detected topic thread_id in database"""
         if not self.supabase:
@@ -137,6 +235,8 @@ class DialogEngine:
                 .update({"topics": topics})\
                 .eq("id", project_id)\
                 .execute()
+            invalidate_project_context(project_id)
+            self._index_project(project_id, self._topic_threads(topics))
 
             logger.info(f"Stored {topic_key}={thread_id} for project {project_id}")
             return True
@@ -158,20 +258,37 @@ class DialogEngine:
         if not self.supabase:
             return None
 
-        try:
-            result = self.supabase.table("projects")\
-                .select("id")\
-                .eq("telegram_group_id", chat_id)\
-                .execute()
-
-            return result.data[0]["id"] if result.data else None
+        project_id = self._project_by_chat.get(chat_id)
+        if project_id:
+            return project_id
+        if self._no_project.get(chat_id, 0) > time.monotonic():
+            return None
 
+        try:
+            return self._fetch_project_by_chat(chat_id)
         except Exception as e:
             logger.error(f"Error getting project: {e}")
             return None
 
+    @timed("supabase_latency_seconds")
+    def _fetch_project_by_chat(self, chat_id: int) -> Optional[str]:
+        """Project of one chat from Supabase, added to the index (topics included)"""
+        result = self.supabase.table("projects")\
+            .select("id, topics")\
+            .eq("telegram_group_id", chat_id)\
+            .execute()
+
+        if not result.data:
+            self._no_project[chat_id] = time.monotonic() + ROUTING_NEGATIVE_TTL_SECONDS
+            return None
+
+        project_id = result.data[0]["id"]
+        self._index_project(project_id, self._topic_threads(result.data[0].get("topics")), chat_id)
+        return project_id
+
     # ==================== STATE MANAGEMENT ====================
 
+    @timed("supabase_latency_seconds")
     def get_dialog_state(self, project_id: str) -> Optional[DialogContext]:
         """
         Get current dialog state from database.
@@ -215,6 +332,7 @@ class DialogEngine:
             logger.error(f"Error getting dialog state: {e}")
             return None
 
+    @timed("supabase_latency_seconds")
     def save_dialog_state(self, context: DialogContext) -> bool:
         """
         Save dialog state to database.
@@ -524,6 +642,7 @@ class DialogEngine:
         first_question = format_question_message(context.current_card, 1)
         return f"🔄 Начинаем карточку заново.\n\n{first_question}", None
 
+    @timed("supabase_latency_seconds")
     def _save_card_to_db(self, context: DialogContext) -> bool:
         """Save completed card to database"""
         if not self.supabase:
@@ -543,6 +662,7 @@ class DialogEngine:
             self.supabase.table("cards")\
                 .upsert(card_data, on_conflict="project_id,type")\
                 .execute()
+            invalidate_project_context(context.project_id)
 
             logger.info(f"Saved card {context.current_card} for project {context.project_id}")
             return True
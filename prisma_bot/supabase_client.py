@@ -1,12 +1,83 @@
 """Supabase client for Prisma bot - shared database with mcards"""
 import logging
-from typing import Optional, Dict, List
-from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, List, Set
+from config import SUPABASE_URL, SUPABASE_SERVICE_KEY, PROJECT_CONTEXT_TTL_SECONDS, PROJECT_CONTEXT_NEGATIVE_TTL_SECONDS
+from metrics import metrics, timed
 
 logger = logging.getLogger(__name__)
 
 _client = None
 
+# Card columns the prompt needs (content can be large, the rest is skipped)
+_CARD_COLUMNS = "type, stage, fill_rate, content"
+_MAX_PROJECT_CONTEXTS = 1000
+
+
+@dataclass
+class ProjectContext:
+    """A chat's project row, its cards and the prompt fragment rendered from them"""
+    project: Optional[Dict]
+    cards: List[Dict] = field(default_factory=list)
+    prompt: str = ""
+
+
+class ProjectContextCache:
+    """
+    ProjectContext per chat_id, reused for `ttl` seconds
+
+    Chats without a project are cached too, for the shorter `negative_ttl`:
+    linking a chat to a project doesn't go through invalidate(). Writers that
+    change a project (cards, topics) call invalidate(project_id); least
+    recently used chats are dropped past max_size.
+    """
+
+    def __init__(self, ttl: float, max_size: int, negative_ttl: float):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # chat_id -> (expires_at, ProjectContext)
+        self._chats_by_project: Dict[str, Set[int]] = {}
+
+    def get(self, chat_id: int) -> Optional[ProjectContext]:
+        entry = self._entries.get(chat_id)
+        if entry is None or entry[0] <= time.monotonic():
+            metrics.inc("project_context_cache_total", result="miss")
+            return None
+        metrics.inc("project_context_cache_total", result="hit")
+        self._entries.move_to_end(chat_id)
+        return entry[1]
+
+    def put(self, chat_id: int, context: ProjectContext):
+        self._drop(chat_id)
+        ttl = self.ttl if context.project else self.negative_ttl
+        self._entries[chat_id] = (time.monotonic() + ttl, context)
+        if context.project:
+            self._chats_by_project.setdefault(context.project["id"], set()).add(chat_id)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, chat_id: int):
+        entry = self._entries.pop(chat_id, None)
+        if entry and entry[1].project:
+            chats = self._chats_by_project.get(entry[1].project["id"])
+            if chats:
+                chats.discard(chat_id)
+                if not chats:
+                    del self._chats_by_project[entry[1].project["id"]]
+
+    def invalidate(self, project_id: str):
+        """Forget every chat linked to `project_id`"""
+        for chat_id in list(self._chats_by_project.get(project_id, ())):
+            self._drop(chat_id)
+
+
+_project_contexts = ProjectContextCache(
+    PROJECT_CONTEXT_TTL_SECONDS, _MAX_PROJECT_CONTEXTS, PROJECT_CONTEXT_NEGATIVE_TTL_SECONDS
+)
+
 def get_supabase():
     """Get Supabase client singleton"""
     global _client
@@ -24,22 +95,55 @@ def get_supabase():
     return _client
 
 
-def get_project_by_chat_id(chat_id: int) -> Optional[Dict]:
-    """Get project from Supabase by Telegram group ID"""
+@timed("supabase_latency_seconds")
+def _load_project_context(client, chat_id: int) -> ProjectContext:
+    """Project row and card projection for a chat (raises on Supabase errors)"""
+    result = client.table("projects")\
+        .select("*")\
+        .eq("telegram_group_id", chat_id)\
+        .execute()
+    if not result.data:
+        return ProjectContext(project=None)
+
+    project = result.data[0]
+    cards = client.table("cards")\
+        .select(_CARD_COLUMNS)\
+        .eq("project_id", project["id"])\
+        .execute().data or []
+    return ProjectContext(project=project, cards=cards, prompt=_render_project_context(project, cards))
+
+
+def get_project_context(chat_id: int) -> ProjectContext:
+    """Cached ProjectContext for a chat (see ProjectContextCache)"""
+    context = _project_contexts.get(chat_id)
+    if context is not None:
+        return context
+
     client = get_supabase()
     if not client:
-        return None
+        return ProjectContext(project=None)
     try:
-        result = client.table("projects")\
-            .select("*")\
-            .eq("telegram_group_id", chat_id)\
-            .execute()
-        return result.data[0] if result.data else None
+        context = _load_project_context(client, chat_id)
     except Exception as e:
-        logger.error(f"Error getting project: {e}")
-        return None
+        # Not cached: the next call retries
+        logger.error(f"Error getting project context: {e}")
+        return ProjectContext(project=None)
+
+    _project_contexts.put(chat_id, context)
+    return context
+
+
+def invalidate_project_context(project_id: str):
+    """Drop the cached context of every chat linked to a project (call after writing to it)"""
+    _project_contexts.invalidate(project_id)
+
+
+def get_project_by_chat_id(chat_id: int) -> Optional[Dict]:
+    """Get project from Supabase by Telegram group ID (cached)"""
+    return get_project_context(chat_id).project
 
 
+@timed("supabase_latency_seconds")
 def get_project_cards(project_id: str) -> List[Dict]:
     """Get all cards for a project"""
     client = get_supabase()
@@ -56,6 +160,7 @@ def get_project_cards(project_id: str) -> List[Dict]:
         return []
 
 
+@timed("supabase_latency_seconds")
 def save_ai_message(project_id: str, user_id: int, agent: str, role: str, content: str):
     """Save message to AI conversation history in Supabase"""
     client = get_supabase()
@@ -78,6 +183,7 @@ def save_ai_message(project_id: str, user_id: int, agent: str, role: str, conten
         logger.error(f"Error saving AI message: {e}")
 
 
+@timed("supabase_latency_seconds")
 def get_or_create_profile(telegram_id: int, username: str = None, first_name: str = None) -> Optional[str]:
     """Get existing profile or create new one for Telegram user"""
     client = get_supabase()
@@ -106,6 +212,7 @@ def get_or_create_profile(telegram_id: int, username: str = None, first_name: st
         return None
 
 
+@timed("supabase_latency_seconds")
 def get_user_balance(telegram_id: int) -> Dict:
     """Get user's spores balance and XP from profiles table"""
     client = get_supabase()
@@ -132,13 +239,12 @@ def get_user_balance(telegram_id: int) -> Dict:
 
 
 def build_project_context(chat_id: int) -> str:
-    """Build context string for AI from project data"""
-    project = get_project_by_chat_id(chat_id)
-    if not project:
-        return ""
+    """Build context string for AI from project data (cached)"""
+    return get_project_context(chat_id).prompt
 
-    cards = get_project_cards(project["id"])
 
+def _render_project_context(project: Dict, cards: List[Dict]) -> str:
+    """Prompt fragment for a project and its cards"""
     # Format filled cards with more detail for Prisma
     cards_summary = []
     for card in cards:
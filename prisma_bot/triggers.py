@@ -0,0 +1,42 @@
+"""
+Trigger word matching
+
+All names and keywords are compiled into one regex once; a single scan of
+the lowercased text tells which groups ("name", "keyword", ...) matched.
+Same result as `any(word in text.lower() for word in group)` per group.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable
+
+
+class TriggerMatcher:
+    """Substring matcher for named groups of trigger words"""
+
+    def __init__(self, **groups: Iterable[str]):
+        words: Dict[str, set] = {}
+        for group, group_words in groups.items():
+            for word in group_words:
+                words.setdefault(word.lower(), set()).add(group)
+
+        # At each position the regex reports only the longest word, so a word
+        # also counts for the groups of every word that is a prefix of it
+        self._groups: Dict[str, FrozenSet[str]] = {
+            word: frozenset().union(*(g for other, g in words.items() if word.startswith(other)))
+            for word in words
+        }
+        self._all = frozenset(groups)
+        # Lookahead: overlapping matches, one attempt per text position
+        alternation = "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))") if words else None
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Groups with at least one word in `text` (case-insensitive)"""
+        if not text or self._pattern is None:
+            return frozenset()
+        found = set()
+        for m in self._pattern.finditer(text.lower()):
+            found |= self._groups[m.group(1)]
+            if len(found) == len(self._all):
+                break
+        return frozenset(found)
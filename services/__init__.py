@@ -0,0 +1,13 @@
+from .outbound import (
+    OutboundRateLimiter,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_DRIP,
+    PRIORITY_BROADCAST,
+)
+
+__all__ = [
+    "OutboundRateLimiter",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_DRIP",
+    "PRIORITY_BROADCAST",
+]
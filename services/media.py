@@ -0,0 +1,137 @@
+"""
+Media sending helpers
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from telegram import (
+    Bot,
+    Message,
+    InputMedia,
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+)
+from telegram.constants import MediaGroupLimit
+from telegram.error import BadRequest, TelegramError
+
+from content.videos import video_registry
+
+logger = logging.getLogger(__name__)
+
+# Bot method for sending a single item of each media type
+_SINGLE_SENDERS = {
+    InputMediaDocument: ("send_document", "document"),
+    InputMediaVideo: ("send_video", "video"),
+    InputMediaPhoto: ("send_photo", "photo"),
+    InputMediaAudio: ("send_audio", "audio"),
+}
+
+
+def _is_file_id_error(error: BadRequest) -> bool:
+    message = str(error).lower()
+    return "file" in message or "identifier" in message
+
+
+async def send_video_or_text(
+    bot: Bot,
+    chat_id: int,
+    video_key: Optional[str],
+    text: str,
+    reply_markup=None,
+    **kwargs
+) -> Message:
+    """
+    Send `text` as the caption of video `video_key`, or as a plain message
+
+    Ids in the registry's negative cache go straight to the text. A file_id
+    Telegram rejects here is marked bad and the text is sent instead.
+    Extra kwargs (e.g. rate_limit_args) are passed to both calls.
+    """
+    video_id = video_registry.get(video_key) if video_key else None
+
+    if video_id:
+        try:
+            return await bot.send_video(
+                chat_id=chat_id,
+                video=video_id,
+                caption=text,
+                reply_markup=reply_markup,
+                **kwargs
+            )
+        except BadRequest as e:
+            if not _is_file_id_error(e):
+                raise
+            logger.error(f"Video {video_key} rejected, sending text instead: {e}")
+            video_registry.mark_bad(video_id)
+
+    return await bot.send_message(
+        chat_id=chat_id,
+        text=text,
+        reply_markup=reply_markup,
+        **kwargs
+    )
+
+
+async def _send_single(bot: Bot, chat_id: int, item: InputMedia, **kwargs):
+    method, field = _SINGLE_SENDERS[type(item)]
+    await getattr(bot, method)(
+        chat_id=chat_id,
+        caption=item.caption,
+        parse_mode=item.parse_mode,
+        **{field: item.media},
+        **kwargs
+    )
+
+
+async def _send_batch(
+    bot: Bot,
+    chat_id: int,
+    batch: Sequence[Tuple[str, InputMedia]],
+    errors: Dict[str, str],
+    **kwargs
+) -> int:
+    if len(batch) > 1:
+        try:
+            await bot.send_media_group(chat_id=chat_id, media=[item for _, item in batch], **kwargs)
+            return len(batch)
+        except TelegramError as e:
+            # A media group fails as a whole: resend one by one to find the broken items
+            logger.warning(f"Media group of {len(batch)} to {chat_id} failed, retrying items: {e}")
+
+    sent = 0
+    for name, item in batch:
+        try:
+            await _send_single(bot, chat_id, item, **kwargs)
+            sent += 1
+        except TelegramError as e:
+            errors[name] = str(e)
+    return sent
+
+
+async def send_media_batches(
+    bot: Bot,
+    chat_id: int,
+    media: Sequence[Tuple[str, InputMedia]],
+    **kwargs
+) -> Tuple[int, Dict[str, str]]:
+    """
+    Send named media items as media groups of up to 10, batches in parallel
+
+    Pacing is left to the bot's rate limiter. Returns the number of items
+    sent and {name: error} for the items that failed.
+    Extra kwargs (e.g. rate_limit_args) are passed to every call.
+    """
+    size = MediaGroupLimit.MAX_MEDIA_LENGTH
+    batches: List[Sequence[Tuple[str, InputMedia]]] = [
+        media[i:i + size] for i in range(0, len(media), size)
+    ]
+    errors: Dict[str, str] = {}
+    sent = await asyncio.gather(*(
+        _send_batch(bot, chat_id, batch, errors, **kwargs) for batch in batches
+    ))
+    # Report failures in input order, whatever order the batches finished in
+    return sum(sent), {name: errors[name] for name, _ in media if name in errors}
@@ -0,0 +1,99 @@
+"""
+Webhook serving mode for the bot
+
+Runs an aiohttp server instead of long polling:
+- POST {WEBHOOK_PATH}: Telegram updates. The secret token header is checked,
+  the update is put on the Application's update queue and 200 is returned
+  right away; handlers run in the background.
+- GET /healthz: liveness for the load balancer
+
+Every replica registers the same webhook URL on startup and never deletes
+it on shutdown, so replicas can be rolled behind a load balancer. The
+sequence poller and nudge sweep don't claim rows, so exactly one replica
+may run them (RUN_JOBS=1, the others RUN_JOBS=0).
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from config import WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def create_webhook_app(app: Application) -> web.Application:
+    """aiohttp application that feeds Telegram updates into `app`"""
+
+    async def handle_update(request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, WEBHOOK_SECRET):
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return web.Response(status=400)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+
+        try:
+            update = Update.de_json(data, app.bot)
+        except (KeyError, TypeError, ValueError):
+            return web.Response(status=400)
+        if update is not None:
+            await app.update_queue.put(update)
+        return web.Response()
+
+    async def handle_health(request: web.Request) -> web.Response:
+        return web.json_response(
+            {"status": "ok" if app.running else "stopped", "update_queue": app.update_queue.qsize()},
+            status=200 if app.running else 503
+        )
+
+    server = web.Application()
+    server.router.add_post(WEBHOOK_PATH, handle_update)
+    server.router.add_get("/healthz", handle_health)
+    return server
+
+
+async def run_webhook(app: Application):
+    """Serve `app` over the webhook until SIGINT / SIGTERM"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    runner = web.AppRunner(create_webhook_app(app))
+    await runner.setup()
+
+    try:
+        # post_init / post_shutdown only run automatically with run_polling / run_webhook
+        await app.initialize()
+        if app.post_init:
+            await app.post_init(app)
+        await app.bot.set_webhook(
+            url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+        await app.start()
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        logger.info(f"Webhook server listening on {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        if app.running:
+            await app.stop()
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import init_db  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh SQLite database; yields a sync session for setting up rows"""
+    session = init_db(f"sqlite:///{tmp_path / 'bot.db'}")
+    yield session
+    session.close()
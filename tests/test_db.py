@@ -0,0 +1,33 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from database import ScheduledMessage, init_db
+
+
+def test_init_db_retrofits_unique_index_on_existing_table(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    # scheduled_messages as created before the unique index existed, with a duplicate
+    conn.execute(
+        "CREATE TABLE scheduled_messages (id INTEGER PRIMARY KEY, telegram_id INTEGER, "
+        "sequence VARCHAR, day FLOAT, score INTEGER, due_at DATETIME, created_at DATETIME)"
+    )
+    conn.executemany(
+        "INSERT INTO scheduled_messages (telegram_id, sequence, day) VALUES (?, ?, ?)",
+        [(1, "seq_a", 2.0), (1, "seq_a", 2.0), (1, "seq_a", 4.0)]
+    )
+    conn.commit()
+    conn.close()
+
+    db = init_db(f"sqlite:///{path}")
+    try:
+        rows = db.query(ScheduledMessage.id, ScheduledMessage.day).order_by(ScheduledMessage.id).all()
+        assert [(row.id, row.day) for row in rows] == [(1, 2.0), (3, 4.0)]
+
+        db.add(ScheduledMessage(telegram_id=1, sequence="seq_a", day=4.0))
+        with pytest.raises(IntegrityError):
+            db.commit()
+    finally:
+        db.close()
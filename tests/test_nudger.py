@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from database import User, close_db, get_user
+from handlers import nudger
+
+
+class FakeSupabase:
+    is_enabled = True
+
+    async def get_project_status_many(self, telegram_ids):
+        return {tid: {"assigned_character": "ever", "vision_progress": 0} for tid in telegram_ids}
+
+
+def _sweep(monkeypatch):
+    sent = []
+
+    async def send_nudge(context, chat_id, nudge):
+        sent.append(chat_id)
+        return True
+
+    monkeypatch.setattr(nudger, "get_supabase_client", FakeSupabase)
+    monkeypatch.setattr(nudger, "send_nudge", send_nudge)
+
+    async def run():
+        try:
+            await nudger.nudge_sweep(None)
+            return sent, {tid: (await get_user(tid)).nudge_count for tid in (1, 2, 3, 4)}
+        finally:
+            await close_db()
+
+    return asyncio.run(run())
+
+
+def test_first_nudge_waits_for_delay_after_quiz(db, monkeypatch):
+    now = datetime.utcnow()
+    db.add_all([
+        User(telegram_id=1, quiz_completed=True, quiz_completed_at=now - timedelta(hours=1)),
+        User(telegram_id=2, quiz_completed=True, quiz_completed_at=now - timedelta(hours=25)),
+        # Took the quiz before quiz_completed_at existed
+        User(telegram_id=3, quiz_completed=True),
+        User(telegram_id=4, quiz_completed=False),
+    ])
+    db.commit()
+
+    sent, counts = _sweep(monkeypatch)
+
+    assert sorted(sent) == [2, 3]
+    assert counts == {1: 0, 2: 1, 3: 1, 4: 0}
+
+
+def test_nudged_user_is_skipped_until_repeat_delay(db, monkeypatch):
+    now = datetime.utcnow()
+    db.add_all([
+        User(telegram_id=1, quiz_completed=True, quiz_completed_at=now - timedelta(days=5),
+             last_nudged_at=now - timedelta(hours=1), nudge_count=1),
+        User(telegram_id=2, quiz_completed=True, quiz_completed_at=now - timedelta(days=5),
+             last_nudged_at=now - timedelta(days=4), nudge_count=1),
+        User(telegram_id=3, quiz_completed=True, quiz_completed_at=now - timedelta(days=30),
+             last_nudged_at=now - timedelta(days=4), nudge_count=5),
+        User(telegram_id=4, quiz_completed=False),
+    ])
+    db.commit()
+
+    sent, counts = _sweep(monkeypatch)
+
+    assert sent == [2]
+    assert counts == {1: 1, 2: 2, 3: 5, 4: 0}
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from database import ScheduledMessage, User, close_db, get_async_session, get_user
+from handlers import sequences
+
+
+def _run(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await close_db()
+    return asyncio.run(run())
+
+
+async def _pending(user_id):
+    async with get_async_session() as db:
+        return await db.scalar(select(func.count()).select_from(ScheduledMessage).where(
+            ScheduledMessage.telegram_id == user_id
+        ))
+
+
+async def _send_due(only_day=None):
+    """Make sequence A rows due (all, or just `only_day`) and run the poller with a fake send"""
+    async with get_async_session() as db:
+        stmt = update(ScheduledMessage).values(due_at=datetime.utcnow() - timedelta(minutes=1))
+        if only_day is not None:
+            stmt = stmt.where(ScheduledMessage.day == only_day)
+        await db.execute(stmt)
+        await db.commit()
+    await sequences.process_due_sequences(None)
+
+
+def _fake_send(monkeypatch):
+    sent = []
+
+    async def send(context, user_id, day):
+        sent.append((user_id, day))
+        return True
+
+    monkeypatch.setattr(sequences, "send_sequence_a_message", send)
+    return sent
+
+
+def test_start_after_finished_sequence_a_does_not_reschedule(db, monkeypatch):
+    sent = _fake_send(monkeypatch)
+    db.add(User(telegram_id=1))
+    db.commit()
+
+    async def scenario():
+        await sequences.schedule_sequence_a(None, 1)
+        await _send_due()
+        assert await _pending(1) == 0
+        # Repeated /start once every message was sent and deleted
+        await sequences.schedule_sequence_a(None, 1)
+        return await _pending(1), (await get_user(1)).sequence_a_day
+
+    pending, step = _run(scenario())
+
+    assert len(sent) == len(sequences.SEQUENCE_A)
+    assert pending == 0
+    assert step == len(sequences.SEQUENCE_A)
+
+
+def test_four_hour_message_is_recorded_as_first_step(db, monkeypatch):
+    _fake_send(monkeypatch)
+    db.add(User(telegram_id=1))
+    db.commit()
+
+    async def scenario():
+        await sequences.schedule_sequence_a(None, 1)
+        await _send_due(only_day=0.17)
+        return await _pending(1), (await get_user(1)).sequence_a_day
+
+    pending, step = _run(scenario())
+
+    assert pending == len(sequences.SEQUENCE_A) - 1
+    assert step == 1
+
+
+def test_start_after_quiz_does_not_schedule_sequence_a(db):
+    db.add(User(telegram_id=1, quiz_completed=True))
+    db.commit()
+
+    async def scenario():
+        await sequences.schedule_sequence_a(None, 1)
+        return await _pending(1)
+
+    assert _run(scenario()) == 0
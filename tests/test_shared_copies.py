@@ -0,0 +1,62 @@
+"""
+Each bot ships its own copy of some modules (the bots deploy separately and
+import them top-level). The copies must not drift: edit one, copy it over.
+"""
+
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COPIES = {
+    "metrics": [
+        "services/metrics.py",
+        "prisma_bot/metrics.py",
+        "community_bot/metrics.py",
+        "kuzya_bot/metrics.py",
+    ],
+    "outbound": [
+        "services/outbound.py",
+        "prisma_bot/services/outbound.py",
+        "community_bot/outbound.py",
+        "kuzya_bot/outbound.py",
+    ],
+    "triggers": [
+        "prisma_bot/triggers.py",
+        "community_bot/triggers.py",
+        "kuzya_bot/triggers.py",
+        "toxic_bot/services/triggers.py",
+    ],
+    "transcription": [
+        "prisma_bot/transcription.py",
+        "kuzya_bot/transcription.py",
+    ],
+}
+
+
+def _read(path: str) -> str:
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        return f.read()
+
+
+def _section(source: str, start: str, end: str) -> str:
+    return source[source.index(start):source.index(end, source.index(start))]
+
+
+@pytest.mark.parametrize("name", sorted(COPIES))
+def test_copies_are_identical(name):
+    first, *others = COPIES[name]
+    for path in others:
+        assert _read(path) == _read(first), f"{path} differs from {first}"
+
+
+def test_aiogram_metrics_shares_the_core():
+    """toxic_bot's metrics swaps the PTB integration for aiogram; the rest is the same code"""
+    ptb = _read("services/metrics.py")
+    aiogram = _read("toxic_bot/services/metrics.py")
+
+    core = ("LabelKey = ", "\n# === ")
+    assert _section(aiogram, *core) == _section(ptb, *core)
+    endpoint = "# === /metrics endpoint ==="
+    assert aiogram[aiogram.index(endpoint):] == ptb[ptb.index(endpoint):]
@@ -11,8 +11,13 @@ from aiogram import Bot, Dispatcher, types, F
 from aiogram.filters import Command
 from aiogram.enums import ParseMode, ChatMemberStatus
 
-from config import TOXIC_BOT_TOKEN, BOT_NAME, BOT_NAMES, TRIGGER_KEYWORDS, get_system_prompt
+from config import (
+    TOXIC_BOT_TOKEN, BOT_NAME, BOT_NAMES, TRIGGER_KEYWORDS, get_system_prompt,
+    METRICS_HOST, METRICS_PORT
+)
 from services.ai_service import generate_response
+from services.metrics import instrument_dispatcher, start_metrics_server
+from services.triggers import TriggerMatcher
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +30,9 @@ logger = logging.getLogger(__name__)
 bot = Bot(token=TOXIC_BOT_TOKEN)
 dp = Dispatcher()
 
+# Names and keywords Toxic reacts to, compiled once
+TRIGGERS = TriggerMatcher(name=BOT_NAMES, keyword=TRIGGER_KEYWORDS)
+
 # Pending introductions: {chat_id: {user_id: (join_time, user_name)}}
 _pending_intros: dict = {}
 
@@ -180,19 +188,11 @@ def should_respond(message: types.Message) -> bool:
     if not message.text:
         return False
 
-    text_lower = message.text.lower()
-
-    # Direct mention
-    for name in BOT_NAMES:
-        if name in text_lower:
-            return True
+    # Direct mention or keyword trigger
+    if TRIGGERS.match(message.text):
+        return True
 
-    # Keyword triggers
-    for keyword in TRIGGER_KEYWORDS:
-        if keyword in text_lower:
-            return True
-
-    # Reply to bot's message
+    # Reply to bot's message (bot.id comes from the token, no API call)
     if message.reply_to_message and message.reply_to_message.from_user:
         if message.reply_to_message.from_user.id == bot.id:
             return True
@@ -401,9 +401,16 @@ async def main():
     """Main function to run the bot"""
     logger.info(f"Starting {BOT_NAME} bot...")
 
+    instrument_dispatcher(dp, bot)
+    metrics_server = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
     # Delete webhook and start polling
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        if metrics_server:
+            await metrics_server.cleanup()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -15,6 +15,9 @@ TOXIC_BOT_TOKEN = os.getenv("TOXIC_BOT_TOKEN", "")
 # Google Gemini API Key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
+# Gemini calls give up after LLM_TIMEOUT_SECONDS
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
 # PostgreSQL Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 
@@ -22,6 +25,10 @@ DATABASE_URL = os.getenv("DATABASE_URL", "")
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
 
+# Prometheus-style metrics: GET /metrics on its own port (0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9094"))
+
 # Bot personality
 BOT_NAME = "Toxic"
 
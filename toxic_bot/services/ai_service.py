@@ -4,10 +4,14 @@ AI Service for Toxic bot using Google Gemini
 
 import logging
 import google.generativeai as genai
-from config import GEMINI_API_KEY
+from config import GEMINI_API_KEY, LLM_TIMEOUT_SECONDS
+from .metrics import await_llm
 
 logger = logging.getLogger(__name__)
 
+# Reply when Gemini fails or times out
+FALLBACK_RESPONSE = "☢️ что-то сломалось. повтори через минуту"
+
 # Configure Gemini
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
@@ -47,10 +51,9 @@ async def generate_response(user_message: str, system_prompt: str) -> str:
 {user_message}"""
 
         # Generate response
-        response = await model.generate_content_async(full_prompt)
-
+        response = await await_llm("generate_response", model.generate_content_async(full_prompt), LLM_TIMEOUT_SECONDS)
         return response.text.strip()
 
     except Exception as e:
-        logger.error(f"Gemini error: {e}")
-        return f"☢️ ошибка: {str(e)[:100]}"
+        logger.error(f"Gemini error: {e!r}")
+        return FALLBACK_RESPONSE
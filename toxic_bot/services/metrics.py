@@ -0,0 +1,395 @@
+"""
+Prometheus-style metrics for Toxic bot
+
+In-process registry, served in the Prometheus text format on GET /metrics
+(start_metrics_server, a separate port from the webhook):
+
+- bot_handler_latency_seconds{handler}: every registered update handler
+  (instrument_dispatcher); bot_handler_latency_window_seconds{handler,quantile}
+  has p50/p95/p99 over the last WINDOW_SIZE calls
+- bot_handler_errors_total{handler}
+- bot_api_requests_total{method,code}, bot_api_latency_seconds{method}:
+  every outbound Bot API call (session middleware)
+- llm_requests_total{call,outcome=ok|error|timeout}, llm_latency_seconds{call},
+  llm_tokens_total{call,kind}: Gemini calls (llm_call / await_llm)
+- db_latency_seconds{op}, supabase_latency_seconds{op} (timed)
+
+Usage:
+    instrument_dispatcher(dp, bot)  # after the handlers are registered
+    server = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    await server.cleanup()  # on shutdown
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.event.bases import CancelHandler, SkipHandler
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramConflictError,
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramServerError,
+    TelegramUnauthorizedError,
+)
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds), from a cached lookup to a slow LLM answer
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Samples per series kept for the quantiles
+WINDOW_SIZE = 1024
+
+HELP = {
+    "bot_handler_latency_seconds": "Update handler latency",
+    "bot_handler_errors_total": "Update handlers that raised",
+    "bot_api_requests_total": "Outbound Bot API calls by method and HTTP status",
+    "bot_api_latency_seconds": "Outbound Bot API call latency",
+    "llm_requests_total": "LLM calls by outcome (ok / error / timeout)",
+    "llm_latency_seconds": "LLM call latency",
+    "llm_tokens_total": "LLM tokens by kind (prompt / completion)",
+    "db_latency_seconds": "Database call latency",
+    "supabase_latency_seconds": "Supabase call latency",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative buckets plus a sliding window of samples for quantiles"""
+
+    __slots__ = ("counts", "sum", "count", "window")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.window = deque(maxlen=WINDOW_SIZE)
+
+    def observe(self, value: float, buckets: Tuple[float, ...]):
+        # le is inclusive: value == bound goes into that bucket
+        self.counts[bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.window.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        """Nearest-rank quantiles over the window"""
+        samples = sorted(self.window)
+        if not samples:
+            return {}
+        return {q: samples[max(0, math.ceil(q * len(samples)) - 1)] for q in QUANTILES}
+
+
+class Metrics:
+    """Counters and histograms keyed by metric name and labels"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        # Timers may be recorded from executor threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: Dict[str, Any]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(len(self.buckets))
+            histogram.observe(value, self.buckets)
+
+    def time(self, name: str, **labels) -> "_Timer":
+        """Context manager observing the elapsed seconds into histogram `name`"""
+        return _Timer(self, name, labels)
+
+    def quantiles(self, name: str, **labels) -> Dict[float, float]:
+        """p50 / p95 / p99 of one series (empty if never observed)"""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(self._key(labels))
+            return histogram.quantiles() if histogram else {}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (math.inf,), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key, le=_number(bound))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+                window = f"{name.rsplit('_seconds', 1)[0]}_window_seconds"
+                lines.append(f"# HELP {window} Quantiles over the last {WINDOW_SIZE} samples")
+                lines.append(f"# TYPE {window} summary")
+                for key, histogram in sorted(series.items()):
+                    for q, value in histogram.quantiles().items():
+                        lines.append(f"{window}{_labels(key, quantile=_number(q))} {_number(value)}")
+                    lines.append(f"{window}_sum{_labels(key)} {_number(sum(histogram.window))}")
+                    lines.append(f"{window}_count{_labels(key)} {len(histogram.window)}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str):
+        if name in HELP:
+            lines.append(f"# HELP {name} {HELP[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "started")
+
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+def timed(metric: str, op: Optional[str] = None) -> Callable:
+    """Decorator timing every call into histogram `metric`{op} (default op: function name)"""
+
+    def decorator(func: Callable) -> Callable:
+        label = op or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with metrics.time(metric, op=label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.time(metric, op=label):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class llm_call:
+    """
+    Time an LLM call and count its tokens
+
+        with llm_call("generate_response") as call:
+            response = await model.generate_content_async(prompt)
+            call.record(response)
+    """
+
+    __slots__ = ("call", "started")
+
+    def __init__(self, call: str):
+        self.call = call
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def record(self, response):
+        """Add the response's usage_metadata to the token counters"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, field in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count")):
+            tokens = getattr(usage, field, None)
+            if tokens:
+                metrics.inc("llm_tokens_total", tokens, call=self.call, kind=kind)
+
+    def __exit__(self, exc_type, exc, tb):
+        metrics.observe("llm_latency_seconds", time.perf_counter() - self.started, call=self.call)
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, asyncio.TimeoutError):
+            outcome = "timeout"
+        else:
+            outcome = "error"
+        metrics.inc("llm_requests_total", call=self.call, outcome=outcome)
+        return False
+
+
+async def await_llm(
+    call: str,
+    work: Union[Awaitable, Callable[[], Any]],
+    timeout: float,
+    executor: Optional[Executor] = None
+):
+    """
+    Await an LLM call timed as llm_call(call); asyncio.TimeoutError after `timeout` seconds
+
+    `work` is a coroutine (async SDK call) or a zero-argument callable (sync
+    SDK call, run on `executor`). On timeout or cancellation the awaiting
+    task is freed; a sync call finishes in its thread in the background.
+    """
+    with llm_call(call) as metric:
+        if callable(work):
+            work = asyncio.get_running_loop().run_in_executor(executor, work)
+        response = await asyncio.wait_for(work, timeout=timeout)
+        metric.record(response)
+    return response
+
+
+# === aiogram integration ===
+
+# Bot API errors by the HTTP status Telegram answered with
+_ERROR_CODES = {
+    TelegramBadRequest: 400,
+    TelegramUnauthorizedError: 401,
+    TelegramForbiddenError: 403,
+    TelegramNotFound: 404,
+    TelegramConflictError: 409,
+    TelegramEntityTooLarge: 413,
+    TelegramRetryAfter: 429,
+    TelegramServerError: 500,
+}
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing every handler call"""
+
+    async def __call__(self, handler, event, data: Dict[str, Any]):
+        handler_object = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else type(event).__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except (SkipHandler, CancelHandler):
+            raise
+        except Exception:
+            metrics.inc("bot_handler_errors_total", handler=name)
+            raise
+        finally:
+            metrics.observe("bot_handler_latency_seconds", time.perf_counter() - started, handler=name)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    """Session middleware counting and timing every Bot API call by method"""
+
+    async def __call__(self, make_request, bot, method):
+        name = method.__api_method__
+        if name == "getUpdates":
+            # Long polling: its latency is the poll timeout
+            return await make_request(bot, method)
+
+        code: Any = "error"
+        started = time.perf_counter()
+        try:
+            response = await make_request(bot, method)
+            code = 200
+            return response
+        except TelegramAPIError as e:
+            code = next((c for cls, c in _ERROR_CODES.items() if isinstance(e, cls)), "error")
+            raise
+        finally:
+            metrics.observe("bot_api_latency_seconds", time.perf_counter() - started, method=name)
+            metrics.inc("bot_api_requests_total", method=name, code=code)
+
+
+def instrument_dispatcher(dp: Dispatcher, bot: Bot) -> int:
+    """Time every handler registered on `dp` and every Bot API call of `bot`; returns the handler count"""
+    middleware = HandlerMetricsMiddleware()
+    wrapped = 0
+    for observer in dp.observers.values():
+        if observer.handlers:
+            observer.middleware(middleware)
+            wrapped += len(observer.handlers)
+    bot.session.middleware(RequestMetricsMiddleware())
+    logger.info(f"Metrics: instrumented {wrapped} handlers")
+    return wrapped
+
+
+# === /metrics endpoint ===
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(body=metrics.render().encode(), headers={"Content-Type": _CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> Optional[web.AppRunner]:
+    """
+    Serve GET /metrics on host:port; None if disabled (port 0) or the port is taken
+
+    Stop it with `await runner.cleanup()`.
+    """
+    if not port:
+        return None
+
+    server = web.Application()
+    server.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(server, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        await runner.cleanup()
+        logger.error(f"Metrics server not started on {host}:{port}: {e}")
+        return None
+    logger.info(f"Metrics on http://{host}:{port}/metrics")
+    return runner